@@ -1,6 +1,6 @@
 import { initializeApp } from "https://www.gstatic.com/firebasejs/10.12.2/firebase-app.js";
 import {
-  getFirestore, collection, doc, getDoc, getDocs
+  getFirestore, collection, getDocs
 } from "https://www.gstatic.com/firebasejs/10.12.2/firebase-firestore.js";
 
 /* ------------------------- CONFIG ------------------------- */
@@ -9,6 +9,8 @@ const USE_FB = !!CFG.USE_FIREBASE;
 
 // CSV (local or GitHub Pages)
 const WEEKLY_CSV_URL = new URL("./assets/weekly_matrix_by_county.csv", document.baseURI).href;
+// Binary series built from that CSV by `python weekly_matrix.py` (preferred when present)
+const WEEKLY_INDEX_URL = new URL("./assets/weekly/weekly_index.json", document.baseURI).href;
 
 /* Chart trim behavior (you can tweak these) */
 const TRIM_THRESHOLD = 10;   // trim leading points until value >= this
@@ -50,6 +52,7 @@ let labelsAll = [];                   // all week_start labels
 let stateSeries = {};                 // { CA: {labels:[], values:[]} }
 let countySeries = {};                // cache: { "CA|losangeles": {labels:[], values:[]} }
 let countyHeaderByNorm = {};          // { CA: { "losangeles": "CA|Los Angeles", ... } }
+let weeklyBin = null;                 // { index, buffer } when the binary artifact loaded
 let hoverChart, hoverChartContainer;
 
 /* ---- Color mode / selections ---- */
@@ -59,9 +62,9 @@ let currentCountyTopMap = new Map();  // for counties view: fips -> tier
 
 /* ------------------------ HELPERS ------------------------- */
 function fmt(n) { n = Number(n || 0); return isFinite(n) ? n.toLocaleString() : "0"; }
-async function loadJSON(url) {
+async function loadJSON(url, cache = "no-store") {
   if (!url) throw new Error("loadJSON: missing URL");
-  const r = await fetch(url, { cache: "no-store" });
+  const r = await fetch(url, { cache });
   if (!r.ok) throw new Error(`fetch failed ${r.status}`);
   return r.json();
 }
@@ -172,11 +175,19 @@ function normalizeSpaName(s) {
 }
 
 /* ---------------------- NORMALIZERS ----------------------- */
+// With `--hoist-periods`, period dates shared by a state's counties / SPAs live once on the
+// state doc (county_periods / spa_periods); a child doc carries only the dates that differ.
+function periodDate(d, shared, key) {
+  return key in d ? (d[key] || "") : (shared?.[key] || "");
+}
 function normalizeStateRec(d) {
   if (!d) return null;
   const rec = {
     total_till_date: Number(d.total_till_date ?? 0),
     color: d.color || "",
+    rank_tier: d.rank_tier,
+    yoy_tier: d.yoy_tier,
+    yoy_lift: d.yoy_lift,
     last_obs_week: {
       start: d.last_obs_week_start || d.last_week_start || "",
       end:   d.last_obs_week_end   || d.last_week_end   || "",
@@ -197,6 +208,8 @@ function normalizeStateRec(d) {
       end:   d.next_month_end   || "",
       count: Number(d.next_month_forecast ?? 0),
     },
+    county_periods: d.county_periods || {},
+    spa_periods: d.spa_periods || {},
   };
   const hasNums =
     rec.total_till_date > 0 ||
@@ -206,30 +219,33 @@ function normalizeStateRec(d) {
     rec.next_month_forecast.count > 0;
   return hasNums ? rec : null;
 }
-function normalizeCountyRec(d) {
+function normalizeCountyRec(d, shared = {}) {
   if (!d) return null;
   const rec = {
     county_name: d.county_name || "",
     total_till_date: Number(d.total_till_date ?? 0),
     color: d.color || "",
+    rank_tier: d.rank_tier,
+    yoy_tier: d.yoy_tier,
+    yoy_lift: d.yoy_lift,
     last_obs_week: {
-      start: d.last_obs_week_start || "",
-      end:   d.last_obs_week_end   || "",
+      start: periodDate(d, shared, "last_obs_week_start"),
+      end:   periodDate(d, shared, "last_obs_week_end"),
       count: Number(d.last_obs_week_count ?? 0),
     },
     last_obs_month: {
-      start: d.last_obs_month_start || "",
-      end:   d.last_obs_month_end   || "",
+      start: periodDate(d, shared, "last_obs_month_start"),
+      end:   periodDate(d, shared, "last_obs_month_end"),
       count: Number(d.last_obs_month_count ?? 0),
     },
     next_week_forecast: {
-      start: d.next_week_start || "",
-      end:   d.next_week_end   || "",
+      start: periodDate(d, shared, "next_week_start"),
+      end:   periodDate(d, shared, "next_week_end"),
       count: Number(d.next_week_forecast ?? 0),
     },
     next_month_forecast: {
-      start: d.next_month_start || "",
-      end:   d.next_month_end   || "",
+      start: periodDate(d, shared, "next_month_start"),
+      end:   periodDate(d, shared, "next_month_end"),
       count: Number(d.next_month_forecast ?? 0),
     },
   };
@@ -241,7 +257,7 @@ function normalizeCountyRec(d) {
     rec.next_month_forecast.count > 0;
   return hasNums ? rec : null;
 }
-function normalizeSpaRec(d) {
+function normalizeSpaRec(d, shared = {}) {
   if (!d) return null;
   const rec = {
     spa_id: d.spa_id || normalizeSpaName(d.spa_name),
@@ -249,23 +265,23 @@ function normalizeSpaRec(d) {
     total_till_date: Number(d.total_till_date ?? 0),
     color: d.color || "",
     last_obs_week: {
-      start: d.last_obs_week_start || "",
-      end:   d.last_obs_week_end   || "",
+      start: periodDate(d, shared, "last_obs_week_start"),
+      end:   periodDate(d, shared, "last_obs_week_end"),
       count: Number(d.last_obs_week_count ?? 0),
     },
     last_obs_month: {
-      start: d.last_obs_month_start || "",
-      end:   d.last_obs_month_end   || "",
+      start: periodDate(d, shared, "last_obs_month_start"),
+      end:   periodDate(d, shared, "last_obs_month_end"),
       count: Number(d.last_obs_month_count ?? 0),
     },
     next_week_forecast: {
-      start: d.next_week_start || "",
-      end:   d.next_week_end   || "",
+      start: periodDate(d, shared, "next_week_start"),
+      end:   periodDate(d, shared, "next_week_end"),
       count: Number(d.next_week_forecast ?? 0),
     },
     next_month_forecast: {
-      start: d.next_month_start || "",
-      end:   d.next_month_end   || "",
+      start: periodDate(d, shared, "next_month_start"),
+      end:   periodDate(d, shared, "next_month_end"),
       count: Number(d.next_month_forecast ?? 0),
     },
   };
@@ -283,47 +299,13 @@ async function fetchStatesFromFirestore() {
   const app = initializeApp(CFG.FIREBASE);
   const db  = getFirestore(app);
 
+  // State docs arrive complete: seed_firestore.py rolls county totals, counts and
+  // period dates up onto states/{STATE}, so one collection read is enough.
   const statesSnap = await getDocs(collection(db, "states"));
   const out = {};
-
   for (const s of statesSnap.docs) {
     const code = (s.id || "").toUpperCase();
-
-    let rec = null;
-    try {
-      const sd = await getDoc(doc(db, "states", code));
-      if (sd.exists()) rec = normalizeStateRec(sd.data());
-    } catch {}
-
-    if (!rec) {
-      const cs = await getDocs(collection(db, "states", code, "counties"));
-      if (!cs.empty) {
-        let t=0, lwc=0, lmc=0, nwf=0, nmf=0;
-        let lwe="", lme="", nwe="", nme="";
-        cs.forEach(c => {
-          const d = normalizeCountyRec(c.data());
-          if (!d) return;
-          t   += Number(d.total_till_date ?? 0);
-          lwc += Number(d.last_obs_week?.count  ?? 0);
-          lmc += Number(d.last_obs_month?.count ?? 0);
-          nwf += Number(d.next_week_forecast?.count ?? 0);
-          nmf += Number(d.next_month_forecast?.count ?? 0);
-          if (d.last_obs_week?.end)  lwe = d.last_obs_week.end;
-          if (d.last_obs_month?.end) lme = d.last_obs_month.end;
-          if (d.next_week_forecast?.end)  nwe = d.next_week_forecast.end;
-          if (d.next_month_forecast?.end) nme = d.next_month_forecast.end;
-        });
-        if (t || lwc || lmc || nwf || nmf) {
-          rec = {
-            total_till_date: t, color: "",
-            last_obs_week: { start:"", end:lwe, count:lwc },
-            last_obs_month:{ start:"", end:lme, count:lmc },
-            next_week_forecast:{ start:"", end:nwe, count:nwf },
-            next_month_forecast:{ start:"", end:nme, count:nmf },
-          };
-        }
-      }
-    }
+    const rec = normalizeStateRec(s.data());
     if (rec) out[code] = rec;
   }
   return out;
@@ -334,7 +316,7 @@ async function fetchCountiesForState(code) {
   const snap = await getDocs(collection(db, "states", code, "counties"));
   const out = {};
   snap.forEach(c => {
-    const rec = normalizeCountyRec(c.data());
+    const rec = normalizeCountyRec(c.data(), statesData?.[code]?.county_periods);
     if (rec) out[c.id] = rec;
   });
   return out;
@@ -345,7 +327,7 @@ async function fetchSPAsFromFirestore() {
   const snap = await getDocs(collection(db, "states", "CA", "spas"));
   const out = {};
   snap.forEach(d => {
-    const rec = normalizeSpaRec(d.data());
+    const rec = normalizeSpaRec(d.data(), statesData?.CA?.spa_periods);
     if (!rec) return;
     const key = normalizeSpaName(rec.spa_id || rec.spa_name);
     out[key] = rec;
@@ -353,6 +335,66 @@ async function fetchSPAsFromFirestore() {
   return out;
 }
 
+/* ------------------- PREBUILT GEOMETRY -------------------- */
+// Written by `build_geometry.py`: simplified TopoJSON, one file per layer / per state.
+async function loadTopoLayer(rel, name) {
+  if (!CFG.GEO_DIR || !window.topojson) return null;
+  try {
+    const url = new URL(`${CFG.GEO_DIR.replace(/\/$/, "")}/${rel}`, document.baseURI).href;
+    const topo = await loadJSON(url, "default");
+    return topojson.feature(topo, topo.objects[name]);
+  } catch (e) {
+    console.warn(`[GEO] ${rel} unavailable, using remote GeoJSON:`, e?.message || e);
+    return null;
+  }
+}
+
+/* -------------------- STATIC SNAPSHOT --------------------- */
+// Written by `seed_firestore.py --export-dir`: manifest.json -> content-hashed JSON files,
+// or by `--backend static`: latest.json -> v/<version>/... (same manifest keys).
+let snapshotManifest = null;
+
+function snapshotURL(rel) {
+  return new URL(rel, new URL(CFG.SNAPSHOT_MANIFEST, document.baseURI)).href;
+}
+async function loadSnapshotManifest() {
+  if (!CFG.SNAPSHOT_MANIFEST) return null;
+  snapshotManifest = await loadJSON(new URL(CFG.SNAPSHOT_MANIFEST, document.baseURI).href);
+  return snapshotManifest;
+}
+async function fetchStatesFromSnapshot() {
+  // hashed file names never change content, so let the browser cache them
+  const national = await loadJSON(snapshotURL(snapshotManifest.national), "default");
+  const out = {};
+  for (const [code, d] of Object.entries(national?.states || {})) {
+    const rec = normalizeStateRec(d);
+    if (rec) out[code.toUpperCase()] = rec;
+  }
+  return out;
+}
+async function fetchCountiesFromSnapshot(code) {
+  const rel = snapshotManifest?.counties?.[code];
+  if (!rel) return {};
+  const docs = await loadJSON(snapshotURL(rel), "default");
+  const out = {};
+  for (const [fips, d] of Object.entries(docs || {})) {
+    const rec = normalizeCountyRec(d, statesData?.[code]?.county_periods);
+    if (rec) out[fips] = rec;
+  }
+  return out;
+}
+async function fetchSPAsFromSnapshot() {
+  const rel = snapshotManifest?.spas?.CA;
+  if (!rel) return {};
+  const docs = await loadJSON(snapshotURL(rel), "default");
+  const out = {};
+  for (const d of Object.values(docs || {})) {
+    const rec = normalizeSpaRec(d, statesData?.CA?.spa_periods);
+    if (rec) out[normalizeSpaName(rec.spa_id || rec.spa_name)] = rec;
+  }
+  return out;
+}
+
 /* -------------------- TLDR / TABLE UI --------------------- */
 function tldrHTML(placeNameOrCode, rec) {
   const title = rec?.county_name || rec?.spa_name || placeNameOrCode;
@@ -429,7 +471,8 @@ async function renderStates() {
 
   viewLevel = "state";
   if (!usGeoJSON) {
-    usGeoJSON = await loadJSON("https://cdn.jsdelivr.net/gh/python-visualization/folium/examples/data/us-states.json");
+    usGeoJSON = await loadTopoLayer("states.topo.json", "states")
+      || await loadJSON("https://cdn.jsdelivr.net/gh/python-visualization/folium/examples/data/us-states.json");
   }
   if (statesLayer) map.removeLayer(statesLayer);
   if (countiesLayer) { map.removeLayer(countiesLayer); countiesLayer = null; }
@@ -503,17 +546,23 @@ async function showCounties(code) {
   if (countiesLayer) map.removeLayer(countiesLayer);
   if (spasLayer) { map.removeLayer(spasLayer); spasLayer = null; }
 
-  const usCountiesGeo = await loadJSON(
-    "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
-  );
-  const prefix = stateCodeToFipsPrefix(code);
-  const filtered = usCountiesGeo.features.filter(f => {
-    const rawId = f.id ?? f.properties?.GEOID ?? f.properties?.COUNTYFP;
-    const fips  = String(rawId ?? "").padStart(5, "0");
-    return fips.startsWith(prefix);
-  });
+  const tile = await loadTopoLayer(`counties/${code}.topo.json`, "counties");
+  let filtered = tile?.features;
+  if (!filtered) {
+    const usCountiesGeo = await loadJSON(
+      "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
+    );
+    const prefix = stateCodeToFipsPrefix(code);
+    filtered = usCountiesGeo.features.filter(f => {
+      const rawId = f.id ?? f.properties?.GEOID ?? f.properties?.COUNTYFP;
+      const fips  = String(rawId ?? "").padStart(5, "0");
+      return fips.startsWith(prefix);
+    });
+  }
 
-  const countiesData = await fetchCountiesForState(code);
+  const countiesData = snapshotManifest
+    ? await fetchCountiesFromSnapshot(code)
+    : await fetchCountiesForState(code);
 
   // County Top10 color tiers for this state (by mode)
   currentCountyTopMap = computeCountyTopMap(code, countiesData);
@@ -594,7 +643,7 @@ async function showSPAs(countyFeature, countyRec) {
 
   let spaFC;
   try {
-    spaFC = await loadJSON(LA_SPA_GEOJSON_URL);
+    spaFC = await loadTopoLayer("spas/CA.topo.json", "spas") || await loadJSON(LA_SPA_GEOJSON_URL);
   } catch (e) {
     console.error("[SPA] load failed:", e);
     alert("Failed to load SPA boundaries.");
@@ -603,12 +652,14 @@ async function showSPAs(countyFeature, countyRec) {
 
   let spaData = {};
   try {
-    spaData = USE_FB ? await fetchSPAsFromFirestore() : {};
+    if (snapshotManifest) spaData = await fetchSPAsFromSnapshot();
+    else spaData = USE_FB ? await fetchSPAsFromFirestore() : {};
   } catch (e) {
     console.warn("SPA Firestore load failed:", e?.message || e);
   }
 
   function featureSpaKey(p) {
+    if (p.spa_key) return p.spa_key;  // prebuilt layer already carries the joined key
     const label = p.SPA_Name || p.SPA_NAM || p.SPA_NAME || `SPA ${p.SPA || ""}`;
     let normalized = normalizeSpaName(label
       .replace(/Los Angeles/gi, "L.A.")
@@ -694,6 +745,28 @@ async function loadWeeklyMatrix() {
     });
   });
 }
+async function loadWeeklyBinary() {
+  const index = await loadJSON(WEEKLY_INDEX_URL);
+  const res = await fetch(new URL(index.data, WEEKLY_INDEX_URL).href);
+  if (!res.ok) throw new Error(`weekly series fetch failed: ${res.status} ${res.statusText}`);
+  return { index, buffer: await res.arrayBuffer() };
+}
+// One series as a plain array; the artifact is little-endian like every browser we target.
+function binarySeries(byteOffset) {
+  const { index, buffer } = weeklyBin;
+  const View = index.dtype === "float32" ? Float32Array : Int32Array;
+  return Array.from(new View(buffer, byteOffset, index.weeks.length));
+}
+function buildIndexFromBinary() {
+  const { index } = weeklyBin;
+  labelsAll = index.weeks;
+  countyHeaderByNorm = index.county_keys || {};
+  const sSeries = {};
+  for (const [code, off] of Object.entries(index.states || {})) {
+    sSeries[code] = { labels: labelsAll, values: binarySeries(off) };
+  }
+  return sSeries;
+}
 // --- robust county normalizer (supports "County of", St./Saint, accents, etc.)
 const normCounty = (s) => (s || "")
   .normalize("NFD").replace(/[\u0300-\u036f]/g, "")
@@ -786,7 +859,9 @@ function getCountySeries(stateCode, countyName){
   const header = mapForState[norm];
   if (!header) return null;
 
-  const vals = weeklyRows.map(r => Number(r[header] ?? 0));
+  const vals = weeklyBin
+    ? binarySeries(weeklyBin.index.counties[stateCode][header])
+    : weeklyRows.map(r => Number(r[header] ?? 0));
   const out = { labels: labelsAll, values: vals };
   countySeries[cacheKey] = out; // cache
   return out;
@@ -1051,9 +1126,22 @@ function top10Tiers(listKeys) {
   return map;
 }
 
+// Tiers precomputed by seed_firestore.py (rank_tier / yoy_tier); null if any doc predates them,
+// or for YoY when the seed run had no weekly matrix (every yoy_lift null)
+function precomputedTiers(entries) {
+  const field = colorMode === "rank" ? "rank_tier" : "yoy_tier";
+  if (!entries.length || entries.some(([, rec]) => rec?.[field] === undefined)) return null;
+  if (colorMode === "yoy" && entries.every(([, rec]) => rec?.yoy_lift == null)) return null;
+  const map = new Map();
+  for (const [key, rec] of entries) if (rec[field]) map.set(key, rec[field]);
+  return map;
+}
+
 function computeStateTopMap() {
   // Only consider states that exist in Firestore
   const fbStates = Object.entries(statesData);
+  const pre = precomputedTiers(fbStates);
+  if (pre) return pre;
 
   if (colorMode === "rank") {
     const ranked = fbStates
@@ -1085,6 +1173,8 @@ function computeStateTopMap() {
 
 function computeCountyTopMap(stateCode, countiesData) {
   const entries = Object.entries(countiesData || {});
+  const pre = precomputedTiers(entries);
+  if (pre) return pre;
   if (colorMode === "rank") {
     const ranked = entries
       .map(([fips, rec]) => ({ fips, total: Number(rec?.total_till_date ?? 0) }))
@@ -1143,7 +1233,12 @@ async function init() {
   Splash.setProgress(25);
   await new Promise(r => setTimeout(r, 200));
   try {
-    if (USE_FB) {
+    if (CFG.SNAPSHOT_MANIFEST && await loadSnapshotManifest().catch(e => {
+      console.warn("Snapshot manifest load failed:", e?.message || e);
+      return null;
+    })) {
+      statesData = await fetchStatesFromSnapshot();
+    } else if (USE_FB) {
       statesData = await fetchStatesFromFirestore();
     } else {
       throw new Error("USE_FIREBASE=false");
@@ -1163,15 +1258,23 @@ async function init() {
     }
   }
 
-  // Load CSV (states + build county index)
+  // Load weekly series: prebuilt binary artifact first, CSV parse as the fallback
   try {
-    const parsed = await loadWeeklyMatrix();
-    stateSeries = buildStateAndCountyIndex(parsed);
-    console.log("[CSV] Weekly series loaded for", Object.keys(stateSeries).length, "states.");
+    weeklyBin = await loadWeeklyBinary();
+    stateSeries = buildIndexFromBinary();
+    console.log("[BIN] Weekly series loaded for", Object.keys(stateSeries).length, "states.");
   } catch (e) {
-    console.warn("Weekly CSV load skipped/failed:", e?.message || e);
-    stateSeries = {};
-    countyHeaderByNorm = {};
+    weeklyBin = null;
+    console.warn("Weekly binary load skipped/failed:", e?.message || e);
+    try {
+      const parsed = await loadWeeklyMatrix();
+      stateSeries = buildStateAndCountyIndex(parsed);
+      console.log("[CSV] Weekly series loaded for", Object.keys(stateSeries).length, "states.");
+    } catch (e2) {
+      console.warn("Weekly CSV load skipped/failed:", e2?.message || e2);
+      stateSeries = {};
+      countyHeaderByNorm = {};
+    }
   }
 
   Splash.setProgress(70);
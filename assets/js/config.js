@@ -14,6 +14,15 @@ window.WF_CONFIG = {
     measurementId: "G-Q1KWKYYSGZ"
   },
 
+  // Static snapshot written by `python seed_firestore.py --export-dir data/snapshot`,
+  // or the versioned tree from `--backend static` (point this at data/static/latest.json).
+  // When set (and reachable) it replaces the Firestore reads entirely.
+  // SNAPSHOT_MANIFEST: "data/snapshot/manifest.json",
+
+  // Simplified TopoJSON written by `python build_geometry.py` (states, per-state counties, SPAs).
+  // When set, boundaries load from here; the remote GeoJSON is only a fallback.
+  // GEO_DIR: "assets/geo",
+
   // Keep your JSON fallbacks (used if USE_FIREBASE=false or Firestore fails)
   // STATES_JSON: "data/sample_states.json",
   // COUNTIES_JSON: {
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# bench_seed.py
+# Benchmark the seeding pipeline on synthetic TLDR inputs against the local Firestore emulator.
+#
+#   gcloud emulators firestore start --host-port=localhost:8080
+#   FIRESTORE_EMULATOR_HOST=localhost:8080 python bench_seed.py --scales 1000 10000 50000
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+import seed_firestore as sf
+
+
+PERIODS = {
+    "last_obs_week_start": "2025-10-06", "last_obs_week_end": "2025-10-12",
+    "last_obs_month_start": "2025-09-15", "last_obs_month_end": "2025-10-12",
+    "next_week_start": "2025-10-13", "next_week_end": "2025-10-19",
+    "next_month_start": "2025-11-01", "next_month_end": "2025-11-30",
+}
+
+
+# Every state prefix with every 3-digit county code: the most distinct valid geoids there are.
+MAX_ROWS = len(sf.STATE_FIPS) * 999
+
+
+# ----------------------------- Synthetic inputs -----------------------------
+def make_inputs(rows: int, out_dir: str, seed: int = 0):
+    """
+    Writes counties_tldr.csv (`rows` rows spread over all states, each with a valid, unique
+    geoid for its state) and spa_tldr.csv.
+    """
+    if rows > MAX_ROWS:
+        raise ValueError(f"{rows} rows: only {MAX_ROWS} valid county geoids exist")
+    rng = np.random.default_rng(seed)
+    states = np.array(sorted(sf.STATE_FIPS))
+    i = np.arange(rows)
+    state = states[i % len(states)]
+    n = i // len(states) + 1  # county codes 001-999 within each state
+    prefix = pd.Series(state).map(sf.STATE_FIPS)
+    counties = pd.DataFrame({
+        "state": state,
+        "geoid": prefix + pd.Series(n).astype(str).str.zfill(3),
+        "county_name": [f"Synthetic {k} County" for k in n],
+        "color": rng.choice(["r", "y", "g"], rows),
+        "total_till_date": rng.integers(0, 30000, rows),
+        "last_obs_week_count": rng.integers(0, 50, rows),
+        "last_obs_month_count": rng.integers(0, 300, rows),
+        "next_week_forecast": rng.integers(0, 150, rows),
+        "next_month_forecast": rng.integers(0, 800, rows),
+        **PERIODS,
+    })
+    n_spas = max(8, rows // 100)
+    spas = pd.DataFrame({
+        "spa_name": [f"Synthetic SPA {k}" for k in range(n_spas)],
+        "color": rng.choice(["r", "y", "g"], n_spas),
+        "total_till_date": rng.integers(0, 9000, n_spas),
+        "last_obs_week_count": rng.integers(0, 20, n_spas),
+        "last_obs_month_count": rng.integers(0, 100, n_spas),
+        "next_week_forecast": rng.integers(0, 60, n_spas),
+        "next_month_forecast": rng.integers(0, 300, n_spas),
+        **PERIODS,
+    })
+    paths = os.path.join(out_dir, "counties_tldr.csv"), os.path.join(out_dir, "spa_tldr.csv")
+    counties.to_csv(paths[0], index=False)
+    spas.to_csv(paths[1], index=False)
+    return paths
+
+
+def reset_emulator():
+    host = os.environ["FIRESTORE_EMULATOR_HOST"]
+    project = os.environ.get("GCLOUD_PROJECT", "demo-wildfire")
+    url = f"http://{host}/emulator/v1/projects/{project}/databases/(default)/documents"
+    urllib.request.urlopen(urllib.request.Request(url, method="DELETE")).close()
+
+
+# ----------------------------- Worker (one scale per process) -----------------------------
+def _rss_mb() -> float | None:
+    """Current resident set size, from /proc (Linux); None where that isn't available."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _process_peak_rss_mb() -> float:
+    """Peak RSS of the whole worker process so far (ru_maxrss), i.e. this stage and all before it."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _stage(name: str, rows: int, seconds: float, **extra):
+    rss = _rss_mb()
+    return {"stage": name, "rows": rows, "seconds": round(seconds, 4),
+            "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+            "rss_mb": None if rss is None else round(rss, 1),
+            "process_peak_rss_mb": round(_process_peak_rss_mb(), 1), **extra}
+
+
+def run_worker(counties_csv: str, spa_csv: str, max_inflight: int) -> list:
+    stages = []
+
+    t0 = time.perf_counter()
+    counties_df = sf.load_counties_csv(counties_csv)
+    spa_df = sf.load_spa_csv(spa_csv)
+    n = len(counties_df) + len(spa_df)
+    stages.append(_stage("load", n, time.perf_counter() - t0))
+
+    t0 = time.perf_counter()
+    partitions = sf.partition_by_state(counties_df)
+    for state, rows in partitions.items():
+        sf.to_payloads(rows, "counties", state)
+    sf.to_payloads(spa_df, "spas", "CA")
+    stages.append(_stage("normalize", n, time.perf_counter() - t0))
+
+    db = sf.init_db(None)
+    committer = sf.BatchCommitter(max_inflight=max_inflight, verbose=False)
+    t0 = time.perf_counter()
+    for state, rows in partitions.items():
+        sf.upsert_counties(db, state, rows, committer=committer)
+    sf.upsert_spas(db, "CA", spa_df, committer=committer)
+    committer.close()
+    dt = time.perf_counter() - t0
+    lat_ms = np.asarray(committer.latencies) * 1000
+    stages.append(_stage(
+        "commit", committer.docs, dt,
+        commits=committer.batches,
+        commits_per_sec=round(committer.batches / dt, 1) if dt else None,
+        retries=committer.retries,
+        p50_commit_ms=round(float(np.percentile(lat_ms, 50)), 1) if lat_ms.size else None,
+        p99_commit_ms=round(float(np.percentile(lat_ms, 99)), 1) if lat_ms.size else None,
+    ))
+    return stages
+
+
+# ----------------------------- Driver -----------------------------
+def print_table(results: list):
+    cols = ["rows", "stage", "seconds", "rows_per_sec", "commits_per_sec", "p50_commit_ms", "p99_commit_ms",
+            "rss_mb", "process_peak_rss_mb"]
+    print("\n" + "  ".join(f"{c:>15}" for c in cols))
+    for r in results:
+        for st in r["stages"]:
+            vals = [r["rows"]] + [st.get(c) for c in cols[1:]]
+            print("  ".join(f"{'' if v is None else v:>15}" for v in vals))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark seed_firestore.py against the Firestore emulator.")
+    ap.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 50000],
+                    help=f"County row counts to benchmark (at most {MAX_ROWS}, the number of valid geoids)")
+    ap.add_argument("--max-inflight", type=int, default=8,
+                    help="Passed through to the batch committer")
+    ap.add_argument("--json", default=None, help="Also write the results here")
+    ap.add_argument("--keep-inputs", action="store_true", help="Don't delete the generated CSVs")
+    ap.add_argument("--worker", nargs=2, metavar=("COUNTIES_CSV", "SPA_CSV"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if any(rows > MAX_ROWS for rows in args.scales):
+        ap.error(f"--scales: at most {MAX_ROWS} rows (one per valid county geoid)")
+
+    if not sf.using_emulator():
+        sys.exit("FIRESTORE_EMULATOR_HOST is not set; start the emulator first "
+                 "(gcloud emulators firestore start --host-port=localhost:8080).")
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker, args.max_inflight)))
+        return
+
+    results = []
+    for rows in args.scales:
+        tmp = tempfile.mkdtemp(prefix=f"bench_{rows}_")
+        try:
+            counties_csv, spa_csv = make_inputs(rows, tmp)
+            reset_emulator()
+            print(f"=== {rows} rows ===")
+            # a fresh process per scale so the process peak is per scale, not cumulative
+            out = subprocess.run(
+                [sys.executable, __file__, "--worker", counties_csv, spa_csv,
+                 "--max-inflight", str(args.max_inflight)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append({"rows": rows, "stages": json.loads(out.strip().splitlines()[-1])})
+        finally:
+            if args.keep_inputs:
+                print(f"  inputs kept in {tmp}")
+            else:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"max_inflight": args.max_inflight, "results": results}, f, indent=1)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# build_geometry.py
+# Preprocess local boundary files into small, simplified, quantized TopoJSON for the map:
+#   <out>/states.topo.json          every state (object "states", id = state code)
+#   <out>/counties/<STATE>.topo.json that state's counties (object "counties", id = geoid)
+#   <out>/spas/CA.topo.json         LA County SPAs (object "spas", id = SPA key)
+# Each layer is simplified for the zoom it is shown at, with shared borders cut into
+# shared arcs first so neighbours stay gap-free, and the TLDR fields are joined onto
+# the feature properties (states by code, counties by geoid, SPAs by slug).
+
+import argparse
+import json
+import math
+import os
+import re
+import urllib.request
+from typing import Dict, List
+
+import numpy as np
+
+import seed_firestore as sf
+
+
+# Where the map used to fetch its shapes at runtime; --download saves them to --src-dir.
+SOURCES = {
+    "states.geojson": "https://cdn.jsdelivr.net/gh/python-visualization/folium/examples/data/us-states.json",
+    "counties.geojson": "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json",
+    "la_spas.geojson": (
+        "https://services1.arcgis.com/ZIL9uO234SBBPGL7/ArcGIS/rest/services/"
+        "Los_Angeles_County_Service_Planning_Areas_Layer/FeatureServer/0/query"
+        "?where=1%3D1&outFields=%2A&outSR=4326&f=geojson"
+    ),
+}
+
+TILE_PX = 256
+TOLERANCE_PX = 1.0     # drop detail smaller than this many screen pixels
+QUANTIZATION = 10_000  # distinct positions per axis within one file's bounding box
+FIT_PX = 800           # viewport size used to guess the zoom a state's counties are shown at
+
+
+# ----------------------------- Geometry input -----------------------------
+def load_features(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("features", []) if data.get("type") == "FeatureCollection" else [data]
+
+
+def polygons_of(geometry) -> List[List[np.ndarray]]:
+    """Polygon / MultiPolygon -> [[outer ring, hole, ...], ...] as float arrays."""
+    if not geometry:
+        return []
+    coords = geometry.get("coordinates") or []
+    if geometry.get("type") == "Polygon":
+        coords = [coords]
+    elif geometry.get("type") != "MultiPolygon":
+        return []
+    return [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in poly if len(ring)] for poly in coords]
+
+
+def degrees_per_px(zoom: float) -> float:
+    return 360.0 / (TILE_PX * 2 ** zoom)
+
+
+def fit_zoom(bbox, px: int = FIT_PX, lo: int = 3, hi: int = 12) -> int:
+    """The zoom fitBounds() lands on for a bbox of (x0, y0, x1, y1) degrees in a px-wide view."""
+    span = max(bbox[2] - bbox[0], (bbox[3] - bbox[1]) * 1.3, 1e-6)  # rough allowance for Mercator stretch
+    return int(min(hi, max(lo, math.floor(math.log2(px * 360.0 / (TILE_PX * span))))))
+
+
+def bbox_of(features) -> tuple:
+    pts = np.concatenate([ring for _, _, polys in features for poly in polys for ring in poly])
+    return (*pts.min(axis=0), *pts.max(axis=0))
+
+
+# ----------------------------- Simplification -----------------------------
+def _dp_keep(pts: np.ndarray, tol: float) -> np.ndarray:
+    """Douglas-Peucker keep-mask for one polyline (endpoints always kept)."""
+    n = len(pts)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        a, seg = pts[i], pts[i + 1:j] - pts[i]
+        d = pts[j] - a
+        length = math.hypot(d[0], d[1])
+        if length == 0:
+            dist = np.hypot(seg[:, 0], seg[:, 1])
+        else:
+            dist = np.abs(d[0] * seg[:, 1] - d[1] * seg[:, 0]) / length
+        k = int(np.argmax(dist))
+        if dist[k] > tol:
+            m = i + 1 + k
+            keep[m] = True
+            stack.append((i, m))
+            stack.append((m, j))
+    return keep
+
+
+def simplify_arc(arc: np.ndarray, scale: np.ndarray, tol: float) -> np.ndarray:
+    """Simplifies a quantized arc with the tolerance in degrees; closed arcs keep a triangle."""
+    if len(arc) <= 2 or tol <= 0:
+        return arc
+    pts = arc * scale
+    keep = _dp_keep(pts, tol)
+    if (arc[0] == arc[-1]).all() and keep.sum() < 5:
+        # a ring on its own: keep the far point and the farthest point of each half
+        far = int(np.argmax(np.hypot(*(pts - pts[0]).T)))
+        keep[far] = True
+        for i, j in ((0, far), (far, len(pts) - 1)):
+            if j > i + 1:
+                d = pts[j] - pts[i]
+                seg = pts[i + 1:j] - pts[i]
+                dist = np.abs(d[0] * seg[:, 1] - d[1] * seg[:, 0]) if d.any() else np.hypot(*seg.T)
+                keep[i + 1 + int(np.argmax(dist))] = True
+    return arc[keep]
+
+
+# ----------------------------- TopoJSON -----------------------------
+def _dedupe_consecutive(q: np.ndarray) -> np.ndarray:
+    if len(q) < 2:
+        return q
+    moved = np.any(q[1:] != q[:-1], axis=1)
+    return q[np.concatenate([[True], moved])]
+
+
+def to_topojson(objects: Dict[str, list], tol_deg: float, quantization: int = QUANTIZATION) -> dict:
+    """
+    objects: {name: [(id, properties, polygons)]} -> a quantized, delta-encoded Topology.
+    Rings are cut at junctions (points whose neighbours differ between rings), identical
+    arcs are stored once, and arcs are simplified after the cut so borders stay shared.
+    """
+    every = [f for feats in objects.values() for f in feats]
+    x0, y0, x1, y1 = bbox_of(every)
+    scale = np.array([(x1 - x0) / (quantization - 1) or 1.0, (y1 - y0) / (quantization - 1) or 1.0])
+    origin = np.array([x0, y0])
+    width = quantization + 1
+
+    # quantize; rings are kept open (no repeated closing point) until they are cut
+    rings = []  # open int rings
+    shapes = {}  # name -> [(id, props, [[ring index, ...], ...])]
+    for name, feats in objects.items():
+        out = shapes.setdefault(name, [])
+        for fid, props, polys in feats:
+            qpolys = []
+            for poly in polys:
+                qrings = []
+                for ring in poly:
+                    q = _dedupe_consecutive(np.round((ring - origin) / scale).astype(np.int64))
+                    if len(q) > 1 and (q[0] == q[-1]).all():
+                        q = q[:-1]
+                    if len(q) >= 3:
+                        qrings.append(len(rings))
+                        rings.append(q)
+                if qrings:
+                    qpolys.append(qrings)
+            out.append((fid, props, qpolys))
+
+    # junctions, vectorized over every point of every ring
+    if rings:
+        keys = [r[:, 0] * width + r[:, 1] for r in rings]
+        k = np.concatenate(keys)
+        prev = np.concatenate([np.roll(r, 1) for r in keys])
+        nxt = np.concatenate([np.roll(r, -1) for r in keys])
+        triples = np.unique(np.stack([k, np.minimum(prev, nxt), np.maximum(prev, nxt)], axis=1), axis=0)
+        pts, counts = np.unique(triples[:, 0], return_counts=True)
+        junctions = pts[counts > 1]
+    else:
+        keys, junctions = [], np.array([], dtype=np.int64)
+
+    arcs, arc_index = [], {}
+
+    def arc_id(arc: np.ndarray) -> int:
+        key = arc.tobytes()
+        if key in arc_index:
+            return arc_index[key]
+        rkey = arc[::-1].tobytes()
+        if rkey in arc_index:
+            return ~arc_index[rkey]
+        arc_index[key] = len(arcs)
+        arcs.append(arc)
+        return arc_index[key]
+
+    ring_arcs = []
+    for r, rk in zip(rings, keys):
+        cuts = np.flatnonzero(np.isin(rk, junctions))
+        if not len(cuts):
+            # free-standing ring: rotate to its smallest point so identical rings match
+            start = int(np.argmin(rk))
+            rot = np.roll(r, -start, axis=0)
+            ring_arcs.append([arc_id(np.vstack([rot, rot[:1]]))])
+            continue
+        rot = np.roll(r, -cuts[0], axis=0)
+        cuts = np.append(cuts - cuts[0], len(r))
+        closed = np.vstack([rot, rot[:1]])
+        ring_arcs.append([arc_id(closed[a:b + 1]) for a, b in zip(cuts[:-1], cuts[1:])])
+
+    simplified = [simplify_arc(a, scale, tol_deg) for a in arcs]
+
+    # drop rings that collapsed, then polygons without an outer ring; renumber the arcs in use
+    used, geometries = {}, {}
+
+    def remap(i: int) -> int:
+        j = ~i if i < 0 else i
+        if j not in used:
+            used[j] = len(used)
+        return used[j] if i >= 0 else ~used[j]
+
+    for name, feats in shapes.items():
+        geoms = []
+        for fid, props, qpolys in feats:
+            polys = []
+            for poly in qpolys:
+                kept = []
+                for n, ri in enumerate(poly):
+                    size = sum(len(simplified[~i if i < 0 else i]) - 1 for i in ring_arcs[ri])
+                    if size >= 3:
+                        kept.append([remap(i) for i in ring_arcs[ri]])
+                    elif n == 0:
+                        break
+                if kept and len(kept[0]):
+                    polys.append(kept)
+            geom = {"id": fid, "properties": props}
+            if len(polys) == 1:
+                geom.update(type="Polygon", arcs=polys[0])
+            elif polys:
+                geom.update(type="MultiPolygon", arcs=polys)
+            else:
+                geom["type"] = None
+            geoms.append(geom)
+        geometries[name] = {"type": "GeometryCollection", "geometries": geoms}
+
+    out_arcs = [None] * len(used)
+    for old, new in used.items():
+        a = simplified[old]
+        out_arcs[new] = np.vstack([a[:1], np.diff(a, axis=0)]).tolist()
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": scale.tolist(), "translate": origin.tolist()},
+        "objects": geometries,
+        "arcs": out_arcs,
+    }
+
+
+def write_topojson(topo: dict, path: str) -> int:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = json.dumps(topo, separators=(",", ":"), default=str)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+# ----------------------------- TLDR joins -----------------------------
+def _props(doc: dict) -> dict:
+    return {k: v for k, v in doc.items() if k not in ("updated_at", "source")}
+
+
+def normalize_spa_name(s: str) -> str:
+    """Python twin of normalizeSpaName() in app.js."""
+    slug = sf._slugify(s)
+    fixes = {"san-fernando-va": "san-fernando-valley", "san-gabriel-val": "san-gabriel-valley"}
+    return fixes.get(slug, slug)
+
+
+def feature_spa_key(p: dict) -> str:
+    """Python twin of featureSpaKey() in app.js: SPA layer properties -> TLDR SPA key."""
+    label = p.get("SPA_Name") or p.get("SPA_NAM") or p.get("SPA_NAME") or f"SPA {p.get('SPA') or ''}"
+    label = re.sub(r"Los Angeles", "L.A.", label, flags=re.I)
+    for word in ("County", "Region", "Area"):
+        label = re.sub(rf"\s+{word}", "", label, flags=re.I)
+    key = normalize_spa_name(re.sub(r"\s+", " ", label).strip())
+    manual = {
+        "san-fernando": "san-fernando-valley",
+        "san-fernando-val": "san-fernando-valley",
+        "metro-los-angeles": "metro-l-a",
+        "metro-los-angeles-region": "metro-l-a",
+        "metro": "metro-l-a",
+        "west": "west-la",
+        "south": "south-la",
+        "east": "east-la",
+        "san-gabriel": "san-gabriel-valley",
+        "san-gabriel-val": "san-gabriel-valley",
+    }
+    return manual.get(key, key)
+
+
+def load_tldr(counties_csv: str, states_csv: str, spa_csv: str):
+    """({STATE: fields}, {geoid: fields}, {spa key: fields}) from the seeder's inputs."""
+    counties_df = sf.load_counties_csv(counties_csv) if counties_csv and os.path.exists(counties_csv) else None
+    counties = {gid: _props(d) for gid, d in sf.to_payloads(counties_df, "counties")} if counties_df is not None else {}
+    states_df = sf.load_state_csv(states_csv) if states_csv and os.path.exists(states_csv) else None
+    codes = set(states_df["state"].astype(str)) if states_df is not None else set()
+    if counties_df is not None:
+        codes |= set(counties_df["state"].astype(str))
+    states = {st: _props(d) for st, d in sf.build_state_fields(states_df, codes, sf.rollup_counties(counties_df)).items()}
+    spas = {}
+    if spa_csv and os.path.exists(spa_csv):
+        for spa_id, d in sf.to_payloads(sf.load_spa_csv(spa_csv), "spas", "CA"):
+            spas[normalize_spa_name(spa_id)] = _props(d)
+    return states, counties, spas
+
+
+# ----------------------------- Layers -----------------------------
+def build_states(features, tldr, zoom: float, quantization: int):
+    feats = []
+    for f in features:
+        code = str(f.get("id") or f.get("properties", {}).get("STUSPS") or "").upper()
+        props = {"name": f.get("properties", {}).get("name", code), **tldr.get(code, {})}
+        feats.append((code, props, polygons_of(f.get("geometry"))))
+    return to_topojson({"states": feats}, TOLERANCE_PX * degrees_per_px(zoom), quantization)
+
+
+def build_county_tiles(features, tldr, zoom, quantization: int):
+    """{STATE: topology} with each state's counties simplified for the zoom it is shown at."""
+    prefix_to_state = {v: k for k, v in sf.STATE_FIPS.items()}
+    by_state = {}
+    for f in features:
+        p = f.get("properties", {})
+        geoid = str(f.get("id") or p.get("GEOID") or p.get("COUNTYFP") or "").zfill(5)
+        state = prefix_to_state.get(geoid[:2])
+        polys = polygons_of(f.get("geometry"))
+        if state and polys:
+            props = {"name": p.get("NAME", ""), **tldr.get(geoid, {})}
+            by_state.setdefault(state, []).append((geoid, props, polys))
+    tiles = {}
+    for state, feats in sorted(by_state.items()):
+        z = fit_zoom(bbox_of(feats)) if zoom == "auto" else float(zoom)
+        tiles[state] = (z, to_topojson({"counties": feats}, TOLERANCE_PX * degrees_per_px(z), quantization))
+    return tiles
+
+
+def build_spas(features, tldr, zoom: float, quantization: int):
+    feats = []
+    for f in features:
+        p = f.get("properties", {})
+        key = feature_spa_key(p)
+        name = p.get("SPA_Name") or p.get("SPA_NAM") or p.get("SPA_NAME") or key
+        feats.append((key, {"name": name, "spa_key": key, **tldr.get(key, {})}, polygons_of(f.get("geometry"))))
+    return to_topojson({"spas": feats}, TOLERANCE_PX * degrees_per_px(zoom), quantization)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build simplified TopoJSON tiles for the map from local boundary files.")
+    ap.add_argument("--src-dir", default="data/geo_src",
+                    help="Where the source GeoJSON lives (states.geojson, counties.geojson, la_spas.geojson)")
+    ap.add_argument("--download", action="store_true",
+                    help="Fetch the source GeoJSON the map used to load at runtime into --src-dir first")
+    ap.add_argument("--out-dir", default="assets/geo", help="Where to write the TopoJSON")
+    ap.add_argument("--counties-csv", default="data/counties_tldr.csv")
+    ap.add_argument("--states-csv", default="data/states_tldr.csv")
+    ap.add_argument("--spa-csv", default="data/spa_tldr.csv")
+    ap.add_argument("--state-zoom", type=float, default=4, help="Zoom the national state layer is simplified for")
+    ap.add_argument("--county-zoom", default="auto",
+                    help="Zoom county tiles are simplified for ('auto' = the zoom each state is fitted at)")
+    ap.add_argument("--spa-zoom", type=float, default=9, help="Zoom the SPA layer is simplified for")
+    ap.add_argument("--quantization", type=int, default=QUANTIZATION,
+                    help="Distinct positions per axis in each file (higher = more precise, larger)")
+    args = ap.parse_args()
+
+    src = {name: os.path.join(args.src_dir, name) for name in SOURCES}
+    if args.download:
+        os.makedirs(args.src_dir, exist_ok=True)
+        for name, url in SOURCES.items():
+            print(f"Downloading {name} ...")
+            urllib.request.urlretrieve(url, src[name])
+
+    states_tldr, counties_tldr, spas_tldr = load_tldr(args.counties_csv, args.states_csv, args.spa_csv)
+
+    if os.path.exists(src["states.geojson"]):
+        topo = build_states(load_features(src["states.geojson"]), states_tldr, args.state_zoom, args.quantization)
+        size = write_topojson(topo, os.path.join(args.out_dir, "states.topo.json"))
+        print(f"states.topo.json: {len(topo['objects']['states']['geometries'])} states, {size / 1024:.0f} KB")
+    else:
+        print(f"Skipping states: {src['states.geojson']} not found (try --download)")
+
+    if os.path.exists(src["counties.geojson"]):
+        tiles = build_county_tiles(load_features(src["counties.geojson"]), counties_tldr,
+                                   args.county_zoom, args.quantization)
+        total = 0
+        for state, (z, topo) in tiles.items():
+            total += write_topojson(topo, os.path.join(args.out_dir, "counties", f"{state}.topo.json"))
+        print(f"counties/: {len(tiles)} state tiles, {total / 1024:.0f} KB total")
+    else:
+        print(f"Skipping counties: {src['counties.geojson']} not found (try --download)")
+
+    if os.path.exists(src["la_spas.geojson"]):
+        topo = build_spas(load_features(src["la_spas.geojson"]), spas_tldr, args.spa_zoom, args.quantization)
+        size = write_topojson(topo, os.path.join(args.out_dir, "spas", "CA.topo.json"))
+        print(f"spas/CA.topo.json: {len(topo['objects']['spas']['geometries'])} SPAs, {size / 1024:.0f} KB")
+    else:
+        print(f"Skipping SPAs: {src['la_spas.geojson']} not found (try --download)")
+
+
+if __name__ == "__main__":
+    main()
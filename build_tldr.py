@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# build_tldr.py
+# Regenerates the TLDR CSVs (counties, states and, given an SPA matrix, SPAs) from the weekly
+# matrix, so the three levels always agree. Observed fields come from one cumulative sum over
+# the weeks x series matrix, with the state series stacked next to the counties so both are
+# computed in the same pass; forecasts come from forecast.py.
+#
+# Per series, matching the hand-built CSVs:
+#   last_obs_week_*   the latest week with a nonzero count (the matrix's last week if none)
+#   last_obs_month_*  the 4 weeks ending with that week
+#   total_till_date   every week in the matrix
+# Forecast periods are the week and calendar month after the matrix's last week for every row.
+
+import argparse
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from forecast import MODELS, forecast_counties
+from tldr_schema import validate
+from weekly_matrix import county_keys, load_weekly_matrix, norm_county, split_header
+
+
+COUNTY_COLUMNS = [
+    "state", "geoid", "county_name", "color", "total_till_date",
+    "last_obs_week_start", "last_obs_week_end", "last_obs_week_count",
+    "last_obs_month_start", "last_obs_month_end", "last_obs_month_count",
+    "next_week_start", "next_week_end", "next_week_forecast",
+    "next_month_start", "next_month_end", "next_month_forecast",
+]
+STATE_COLUMNS = ["state", "state_name", "total_till_date", "color"] + COUNTY_COLUMNS[5:]
+SPA_COLUMNS = ["spa_name", "color", "total_till_date"] + COUNTY_COLUMNS[5:]
+MONTH_WEEKS = 4
+
+
+# ----------------------------- Observed fields -----------------------------
+def observed_fields(weeks: List[str], Y: np.ndarray) -> pd.DataFrame:
+    """One row per column of Y (weeks x series): totals and last week / last 4 weeks."""
+    T, N = Y.shape
+    cols = np.arange(N)
+    seen = Y > 0
+    # index of the latest nonzero week per series, from one argmax over the reversed matrix
+    last = np.where(seen.any(axis=0), T - 1 - np.argmax(seen[::-1], axis=0), T - 1)
+    C = np.vstack([np.zeros((1, N)), np.cumsum(Y, axis=0)])  # C[t] = sum of weeks before t
+    week_start = pd.to_datetime(pd.Index(weeks)[last])
+    return pd.DataFrame({
+        "total_till_date": C[T],
+        "last_obs_week_start": week_start,
+        "last_obs_week_end": week_start + pd.Timedelta(days=6),
+        "last_obs_week_count": Y[last, cols],
+        "last_obs_month_start": week_start - pd.Timedelta(days=7 * (MONTH_WEEKS - 1)),
+        "last_obs_month_end": week_start + pd.Timedelta(days=6),
+        "last_obs_month_count": C[last + 1, cols] - C[np.maximum(last + 1 - MONTH_WEEKS, 0), cols],
+    }).astype({"total_till_date": "int64", "last_obs_week_count": "int64", "last_obs_month_count": "int64"})
+
+
+def with_state_rollups(headers: List[str], Y: np.ndarray):
+    """Y with one summed column per state appended, plus the state codes in column order."""
+    codes = [split_header(h)[0] for h in headers]
+    states = sorted(set(codes))
+    member = np.zeros((len(headers), len(states)))
+    member[np.arange(len(headers)), [states.index(c) for c in codes]] = 1
+    return np.hstack([Y, Y @ member]), states
+
+
+def _reference(path: str | None) -> pd.DataFrame | None:
+    if not path or not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+# ----------------------------- Tables -----------------------------
+def _report_unmatched(kind: str, ref_ids, built_ids):
+    """Says how many reference rows the matrix has no series for (they're not in the rebuilt table)."""
+    gone = sorted(set(ref_ids) - set(built_ids))
+    if gone:
+        print(f"  {len(gone)} reference {kind} have no matrix column; not in the rebuilt table: "
+              f"{', '.join(gone[:10])}{' ...' if len(gone) > 10 else ''}")
+
+
+def build_tables(weekly, counties_ref: pd.DataFrame | None, states_ref: pd.DataFrame | None,
+                 model: str = "ses") -> Dict[str, pd.DataFrame]:
+    """{"counties": df, "states": df} in the TLDR CSV layouts."""
+    weeks, headers, values = weekly
+    Z, states = with_state_rollups(headers, values)
+    obs = observed_fields(weeks, Z)
+    fc = forecast_counties(weekly, model)
+    fc_cols = [c for c in COUNTY_COLUMNS if c.startswith("next_")]
+
+    # counties: matrix columns matched to the reference table's geoids by normalized name
+    counties = pd.concat([fc[["state", "county"]], obs.iloc[:len(headers)].reset_index(drop=True),
+                          fc[fc_cols]], axis=1)
+    geoids, colors = {}, {}
+    if counties_ref is not None:
+        for r in counties_ref.itertuples(index=False):
+            key = f"{r.state.upper()}|{norm_county(r.county_name)}"
+            geoids[key] = r.geoid.zfill(5)
+            colors[key] = getattr(r, "color", "")
+    keys = [next((f"{s}|{k}" for k in sorted(county_keys(c)) if f"{s}|{k}" in geoids), None)
+            for s, c in zip(counties["state"], counties["county"])]
+    counties["geoid"] = [geoids.get(k) for k in keys]
+    counties["color"] = [colors.get(k, "") for k in keys]
+    missing = counties["geoid"].isna()
+    if missing.any():
+        print(f"  {int(missing.sum())} matrix counties have no geoid in the reference table; "
+              f"left out of counties (still counted in their state)")
+    counties = (counties[~missing].rename(columns={"county": "county_name"})
+                .sort_values(["state", "geoid"])[COUNTY_COLUMNS].reset_index(drop=True))
+    if counties_ref is not None:
+        _report_unmatched("counties", counties_ref["geoid"].str.zfill(5), counties["geoid"])
+
+    # states: the rollup columns, forecasts as the sum of their counties' forecasts
+    st = obs.iloc[len(headers):].reset_index(drop=True)
+    st.insert(0, "state", states)
+    sums = fc.groupby("state")[["next_week_forecast", "next_month_forecast"]].sum()
+    for c in fc_cols:
+        st[c] = sums.loc[states, c].to_numpy() if c in sums.columns else fc[c].iloc[0]
+    ref = states_ref.set_index(states_ref["state"].str.upper()) if states_ref is not None else pd.DataFrame()
+    _report_unmatched("states", ref.index, st["state"])
+    for c in ("state_name", "color"):
+        st[c] = st["state"].map(ref[c]).fillna("") if c in ref.columns else ""
+    return {"counties": counties, "states": st[STATE_COLUMNS]}
+
+
+def build_spa_table(weekly, spa_ref: pd.DataFrame | None, model: str = "ses") -> pd.DataFrame:
+    """The SPA table from an SPA matrix (week_start + one column per SPA name)."""
+    weeks, headers, values = weekly
+    names = [h.split("|", 1)[-1].strip() for h in headers]
+    obs = observed_fields(weeks, values)
+    fc = forecast_counties((weeks, [f"CA|{n}" for n in names], values), model)
+    out = pd.concat([pd.DataFrame({"spa_name": names}), obs, fc[[c for c in SPA_COLUMNS if c.startswith("next_")]]],
+                    axis=1)
+    colors = dict(zip(spa_ref["spa_name"], spa_ref["color"])) if spa_ref is not None and "color" in spa_ref else {}
+    out["color"] = out["spa_name"].map(colors).fillna("")
+    if spa_ref is not None:
+        _report_unmatched("SPAs", spa_ref["spa_name"], out["spa_name"])
+    return out[SPA_COLUMNS]
+
+
+def load_spa_matrix(path: str):
+    """Like load_weekly_matrix, but any column other than week_start is an SPA series."""
+    df = pd.read_csv(path, dtype={"week_start": str})
+    if "week_start" not in df.columns:
+        raise ValueError(f"{path}: SPA matrix missing required column: 'week_start'")
+    headers = [c for c in df.columns if c != "week_start"]
+    values = df[headers].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+    return df["week_start"].astype(str).tolist(), headers, values
+
+
+def write_table(df: pd.DataFrame, path: str, kind: str):
+    """Checks the table against the loader's schema, then writes it atomically."""
+    validate(df.astype(str).replace({"NaT": ""}), kind, path)
+    tmp = path + ".tmp"
+    df.to_csv(tmp, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp, path)
+    print(f"Wrote {len(df)} rows to {path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild the TLDR CSVs from the weekly matrix.")
+    ap.add_argument("--weekly-csv", default="assets/weekly_matrix_by_county.csv",
+                    help="Weekly county matrix (week_start + one 'STATE|County' column per county)")
+    ap.add_argument("--spa-weekly-csv", default=None,
+                    help="Weekly SPA matrix (week_start + one column per SPA); without it spa_tldr.csv is left as is")
+    ap.add_argument("--counties-ref", default="data/counties_tldr.csv",
+                    help="Table the county geoids (and colors) are taken from, matched by state + county name")
+    ap.add_argument("--states-ref", default="data/states_tldr.csv", help="Table the state names and colors come from")
+    ap.add_argument("--spa-ref", default="data/spa_tldr.csv", help="Table the SPA colors come from")
+    ap.add_argument("--out-dir", default="data/build",
+                    help="Where counties_tldr.csv / states_tldr.csv / spa_tldr.csv go (kept apart from the "
+                         "hand-maintained tables in data/, which are only the references)")
+    ap.add_argument("--model", choices=sorted(MODELS), default="ses", help="Forecast model (see forecast.py)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    weekly = load_weekly_matrix(args.weekly_csv)
+    print(f"Loaded {len(weekly[0])} weeks x {len(weekly[1])} counties from {args.weekly_csv}")
+    # references are read up front, in case --out-dir points back at them
+    refs = {k: _reference(p) for k, p in (("counties", args.counties_ref), ("states", args.states_ref),
+                                         ("spas", args.spa_ref))}
+    tables = build_tables(weekly, refs["counties"], refs["states"], args.model)
+    if args.spa_weekly_csv:
+        tables["spas"] = build_spa_table(load_spa_matrix(args.spa_weekly_csv), refs["spas"], args.model)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    names = {"counties": "counties_tldr.csv", "states": "states_tldr.csv", "spas": "spa_tldr.csv"}
+    for kind, df in tables.items():
+        write_table(df, os.path.join(args.out_dir, names[kind]), kind)
+    print(f"Done in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# forecast.py
+# Baseline forecasts of the next_week / next_month fields, computed from the weekly county matrix
+# for every county at once. A model is a function of the (weeks x counties) matrix that returns
+# (horizon x counties) weekly forecasts using whole-matrix NumPy operations; models register by
+# name in MODELS. The seeder applies the result to the loaded frames with --forecast-model.
+
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from weekly_matrix import county_keys, load_weekly_matrix, norm_county, split_header, state_columns
+
+
+# ----------------------------- Models -----------------------------
+# name -> fn(Y, horizon) -> (horizon, n_series); Y is weeks x series, oldest week first.
+MODELS: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {}
+
+
+def register(name: str):
+    """Adds a model to MODELS (and so to --model / --forecast-model)."""
+    def deco(fn):
+        MODELS[name] = fn
+        return fn
+    return deco
+
+
+def _flat(level: np.ndarray, horizon: int) -> np.ndarray:
+    return np.repeat(level[None, :], horizon, axis=0)
+
+
+@register("naive")
+def naive(Y: np.ndarray, horizon: int) -> np.ndarray:
+    """Every future week repeats the last observed week."""
+    return _flat(Y[-1], horizon)
+
+
+@register("moving_average")
+def moving_average(Y: np.ndarray, horizon: int, window: int = 4) -> np.ndarray:
+    """Mean of the last `window` weeks."""
+    return _flat(Y[-window:].mean(axis=0), horizon)
+
+
+@register("ses")
+def ses(Y: np.ndarray, horizon: int, alpha: float = 0.3) -> np.ndarray:
+    """
+    Simple exponential smoothing (level starts at the first week). The recursion unrolls into
+    fixed weights per week, so every series' level is one matrix-vector product.
+    """
+    T = len(Y)
+    age = np.arange(T - 1, -1, -1)  # 0 for the latest week
+    w = alpha * (1 - alpha) ** age
+    w[0] = (1 - alpha) ** (T - 1)
+    return _flat(w @ Y, horizon)
+
+
+@register("seasonal_naive")
+def seasonal_naive(Y: np.ndarray, horizon: int, season: int = 52) -> np.ndarray:
+    """
+    Each future week repeats the same week a year earlier, scaled to the last 8 weeks' level
+    against the same 8 weeks a year before. Falls back to ses() with under a year of history.
+    """
+    T = len(Y)
+    if T < season + 8 or T - season + horizon > T:
+        return ses(Y, horizon)
+    last_year = Y[T - season:T - season + horizon]
+    recent, before = Y[-8:].sum(axis=0), Y[T - season - 8:T - season].sum(axis=0)
+    scale = np.divide(recent, before, out=np.ones_like(recent), where=before > 0)
+    return last_year * np.clip(scale, 0, 4)
+
+
+# ----------------------------- Periods -----------------------------
+def forecast_periods(last_week_start: str) -> Dict:
+    """
+    The periods forecasts are issued for, given the matrix's last week: next week is the one
+    right after it, next month the calendar month after the one that week starts in (the
+    same periods the TLDR CSVs use). `month_weights[i]` is the share of forecast week i+1
+    that falls inside next month, so next month = month_weights @ weekly forecasts.
+    """
+    last = pd.Timestamp(last_week_start)
+    week_start = last + pd.Timedelta(days=7)
+    month_start = (last.to_period("M") + 1).start_time
+    month_end = month_start + pd.offsets.MonthEnd(0)
+    horizon = math.ceil((month_end - last).days / 7)
+    starts = last + pd.to_timedelta(7 * np.arange(1, horizon + 1), unit="D")
+    first = np.maximum(starts.values, month_start.to_datetime64())
+    stop = np.minimum((starts + pd.Timedelta(days=6)).values, month_end.to_datetime64())
+    days = ((stop - first) / np.timedelta64(1, "D") + 1).clip(0)
+    return {
+        "next_week_start": week_start,
+        "next_week_end": week_start + pd.Timedelta(days=6),
+        "next_month_start": month_start,
+        "next_month_end": month_end,
+        "horizon": horizon,
+        "month_weights": days / 7,
+    }
+
+
+# ----------------------------- Running -----------------------------
+def _run(model: str, Y: np.ndarray, horizon: int) -> np.ndarray:
+    return MODELS[model](Y, horizon)
+
+
+def forecast_matrix(Y: np.ndarray, headers: List[str], model: str, horizon: int,
+                    workers: int = 1) -> np.ndarray:
+    """
+    (horizon, n_series) forecasts. With workers > 1, state shards run in separate processes
+    (models registered outside this module need a fork start method to be found there).
+    """
+    if workers <= 1:
+        return _run(model, Y, horizon)
+    out = np.empty((horizon, Y.shape[1]))
+    shards = list(state_columns(headers).values())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futs = [(cols, pool.submit(_run, model, Y[:, cols], horizon)) for cols in shards]
+        for cols, fut in futs:
+            out[:, cols] = fut.result()
+    return out
+
+
+def forecast_counties(weekly, model: str = "ses", workers: int = 1) -> pd.DataFrame:
+    """
+    One row per matrix county: state, county, the four period dates and the two forecasts
+    (non-negative whole counts).
+    """
+    weeks, headers, values = weekly
+    if model not in MODELS:
+        raise ValueError(f"unknown forecast model '{model}' (have: {', '.join(sorted(MODELS))})")
+    if not weeks:
+        raise ValueError("weekly matrix has no weeks to forecast from")
+    p = forecast_periods(weeks[-1])
+    F = np.clip(forecast_matrix(values, headers, model, p["horizon"], workers), 0, None)
+    states, counties = zip(*map(split_header, headers)) if headers else ((), ())
+    out = pd.DataFrame({"state": list(states), "county": list(counties)})
+    for c in ("next_week_start", "next_week_end", "next_month_start", "next_month_end"):
+        out[c] = p[c]
+    out["next_week_forecast"] = np.rint(F[0]).astype("int64")
+    out["next_month_forecast"] = np.rint(p["month_weights"] @ F).astype("int64")
+    return out
+
+
+FORECAST_FIELDS = ("next_week_start", "next_week_end", "next_week_forecast",
+                   "next_month_start", "next_month_end", "next_month_forecast")
+
+
+def apply_county_forecasts(df: pd.DataFrame | None, fc: pd.DataFrame,
+                           verbose: bool = True) -> pd.DataFrame | None:
+    """
+    Overwrites the forecast fields of a loaded counties frame with `fc`, matching counties by
+    state + normalized name (the matrix has no geoids). Unmatched counties keep their CSV values.
+    """
+    if df is None or df.empty or "county_name" not in df.columns:
+        return df
+    lookup = {}
+    for i, (state, county) in enumerate(zip(fc["state"], fc["county"])):
+        for key in county_keys(county):
+            lookup.setdefault(f"{state}|{key}", i)
+    keys = df["state"].astype(str) + "|" + df["county_name"].map(norm_county)
+    idx = keys.map(lookup)
+    hit = idx.notna().to_numpy()
+    rows = idx[hit].astype(int).to_numpy()
+    df = df.copy()
+    for c in FORECAST_FIELDS:
+        values = fc[c].to_numpy()[rows]
+        if c in df.columns:
+            df.loc[hit, c] = values
+        else:
+            df[c] = pd.Series(values, index=df.index[hit]).reindex(df.index)
+    if verbose and (~hit).any():
+        print(f"  forecast: {int((~hit).sum())} of {len(df)} counties not in the weekly matrix; kept their CSV values")
+    return df
+
+
+def apply_state_forecasts(df: pd.DataFrame | None, fc: pd.DataFrame) -> pd.DataFrame | None:
+    """Overwrites a loaded states frame's forecast fields with the sum of its counties' forecasts."""
+    if df is None or df.empty or "state" not in df.columns or fc.empty:
+        return df
+    sums = fc.groupby("state")[["next_week_forecast", "next_month_forecast"]].sum()
+    hit = df["state"].astype(str).isin(sums.index).to_numpy()
+    codes = df.loc[hit, "state"].astype(str)
+    df = df.copy()
+    for c in FORECAST_FIELDS:
+        values = sums.loc[codes, c].to_numpy() if c in sums.columns else fc[c].iloc[0]
+        if c in df.columns:
+            df.loc[hit, c] = values
+        else:
+            df[c] = pd.Series(values, index=df.index[hit]).reindex(df.index)
+    return df
+
+
+def backtest(Y: np.ndarray, model: str, folds: int = 8) -> float:
+    """Mean absolute next-week error over the last `folds` weeks, all series at once per fold."""
+    if not 0 < folds < len(Y):
+        # every fold needs at least one earlier week to forecast from
+        raise ValueError(f"backtest needs 1 to {len(Y) - 1} folds for {len(Y)} weeks, got {folds}")
+    errors = [np.abs(MODELS[model](Y[:t], 1)[0] - Y[t]).mean() for t in range(len(Y) - folds, len(Y))]
+    return float(np.mean(errors))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Forecast next week / next month for every county in the weekly matrix.")
+    ap.add_argument("--weekly-csv", default="assets/weekly_matrix_by_county.csv",
+                    help="Weekly matrix CSV (week_start + one 'STATE|County' column per county)")
+    ap.add_argument("--model", choices=sorted(MODELS), default="ses")
+    ap.add_argument("--workers", type=int, default=1, help="Processes to shard the states across")
+    ap.add_argument("--out", default="data/forecasts.csv", help="Where to write the per-county forecasts")
+    ap.add_argument("--evaluate", type=int, default=0,
+                    help="Instead, print every model's next-week MAE over this many held-out weeks")
+    args = ap.parse_args()
+
+    weekly = load_weekly_matrix(args.weekly_csv)
+    weeks, headers, values = weekly
+    print(f"Loaded {len(weeks)} weeks x {len(headers)} counties from {args.weekly_csv}")
+    if args.evaluate:
+        if not 0 < args.evaluate < len(weeks):
+            raise SystemExit(f"--evaluate: the matrix has {len(weeks)} weeks; hold out 1 to {len(weeks) - 1}")
+        for name in sorted(MODELS):
+            print(f"  {name:<16} MAE {backtest(values, name, args.evaluate):.3f}")
+        return
+    fc = forecast_counties(weekly, args.model, args.workers)
+    fc.to_csv(args.out, index=False, date_format="%Y-%m-%d")
+    print(f"Wrote {len(fc)} {args.model} forecasts for week {fc['next_week_start'].iloc[0]:%Y-%m-%d} "
+          f"and {fc['next_month_start'].iloc[0]:%B %Y} to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# forecast_history.py
+# Append-only history of every seed's forecasts, as a small partitioned Parquet dataset:
+#   <root>/<kind>/state=<ST>/run_date=<YYYY-MM-DD>.parquet   one file per entity kind, state and run
+#   <root>/manifest.json    per run: files and row counts plus the forecast / observed week ranges
+# The manifest lets queries open only the files that can match: an entity's history reads
+# one state's files, a week's forecast-vs-observed reads only the runs that cover that week.
+
+import argparse
+import json
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+# Per kind: the column that identifies an entity within its state.
+ID_COLUMNS = {"states": "state", "counties": "geoid", "spas": "spa_id"}
+
+# What a run keeps per entity; anything else on the docs (ranks, names) is derivable.
+HISTORY_FIELDS = (
+    "color",
+    "total_till_date",
+    "last_obs_week_start",
+    "last_obs_week_end",
+    "last_obs_week_count",
+    "last_obs_month_start",
+    "last_obs_month_end",
+    "last_obs_month_count",
+    "next_week_start",
+    "next_week_end",
+    "next_week_forecast",
+    "next_month_start",
+    "next_month_end",
+    "next_month_forecast",
+)
+COUNT_FIELDS = ("total_till_date", "last_obs_week_count", "last_obs_month_count",
+                "next_week_forecast", "next_month_forecast")
+DATE_FIELDS = tuple(f for f in HISTORY_FIELDS if f.endswith(("_start", "_end")))
+
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Narrow dtypes for storage: int32 counts, parsed dates, categorical text."""
+    out = df.copy()
+    for c in COUNT_FIELDS:
+        if c in out.columns:
+            out[c] = pd.to_numeric(out[c], errors="coerce").astype("Int32")
+    for c in DATE_FIELDS:
+        if c in out.columns:
+            out[c] = pd.to_datetime(out[c].replace("", None), errors="coerce", format="ISO8601")
+    for c in ("state", "color"):
+        if c in out.columns:
+            out[c] = out[c].astype(str).astype("category")
+    return out
+
+
+# ----------------------------- Recording -----------------------------
+class HistoryRecorder:
+    """
+    Collects one run's entities as they are seeded and writes them as that run's partitions.
+    Re-running on the same run date replaces only the (kind, state) partitions the rerun
+    writes, so an --only-state rerun keeps the other states; other runs are never touched.
+    """
+
+    def __init__(self, root: str, run_date: str):
+        self.root = root
+        self.run_date = pd.Timestamp(run_date).strftime("%Y-%m-%d")
+        self.frames: Dict[str, List[pd.DataFrame]] = {k: [] for k in ID_COLUMNS}
+
+    def add(self, kind: str, df: pd.DataFrame, state: str | None = None):
+        id_col = ID_COLUMNS[kind]
+        if df is None or df.empty:
+            return
+        keep = pd.DataFrame({"id": df[id_col].astype(str)}, index=df.index)
+        if kind == "counties":
+            keep["id"] = keep["id"].str.zfill(5)
+        keep["state"] = state.upper() if state else df["state"].astype(str).str.upper()
+        for c in HISTORY_FIELDS:
+            if c in df.columns:
+                keep[c] = df[c]
+        self.frames[kind].append(keep)
+
+    def add_states(self, fields_by_state: Dict[str, Dict[str, Any]]):
+        df = pd.DataFrame.from_dict(fields_by_state, orient="index")
+        df["state"] = df.index
+        self.add("states", df.reset_index(drop=True))
+
+    def table(self, kind: str) -> pd.DataFrame:
+        frames = self.frames[kind]
+        return _compact(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+
+    def write(self) -> Dict[str, Any]:
+        manifest = load_manifest(self.root)
+        run = manifest["runs"].get(self.run_date, {"files": {}})
+        counts = run.setdefault("counts", {})
+        # week ranges only widen on a merge: a range that over-covers just opens one more file
+        weeks = {col: [pd.Timestamp(d) for d in run.get(col) or ()]
+                 for col in ("next_week_start", "last_obs_week_start")}
+        for kind in ID_COLUMNS:
+            df = self.table(kind)
+            if df.empty:
+                continue
+            for col in weeks:
+                if col in df.columns and df[col].notna().any():
+                    weeks[col] += [df[col].min(), df[col].max()]
+            files = run["files"].setdefault(kind, {})
+            for state, part in df.groupby("state", observed=True):
+                rel = f"{kind}/state={state}/run_date={self.run_date}.parquet"
+                path = os.path.join(self.root, rel)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                part.drop(columns=["state"]).sort_values("id").to_parquet(
+                    path, index=False, compression="zstd")
+                files[str(state)] = rel
+                counts.setdefault(kind, {})[str(state)] = len(part)
+        for col, vals in weeks.items():
+            run[col] = [min(vals).strftime("%Y-%m-%d"), max(vals).strftime("%Y-%m-%d")] if vals else None
+
+        # partitions kept from an earlier write of this run, recorded before counts were kept
+        for kind, by_state in run["files"].items():
+            for state, rel in by_state.items():
+                if state not in counts.get(kind, {}):
+                    n = len(pd.read_parquet(os.path.join(self.root, rel), columns=["id"]))
+                    counts.setdefault(kind, {})[state] = n
+        run["rows"] = sum(n for by_state in counts.values() for n in by_state.values())
+        manifest["runs"][self.run_date] = run
+        _save_manifest(self.root, manifest)
+        return run
+
+    def deltas(self) -> List[tuple]:
+        """
+        (doc path, changed fields) per entity whose fields differ from the previous run's,
+        for the optional Firestore `history` subcollections. The first run writes everything.
+        """
+        out = []
+        for kind in ID_COLUMNS:
+            cur = self.table(kind)
+            if cur.empty:
+                continue
+            prev = read_run(self.root, previous_run(self.root, self.run_date), kind)
+            fields = [c for c in HISTORY_FIELDS if c in cur.columns]
+            cur = cur.set_index(["state", "id"])
+            if not prev.empty:
+                prev = prev.set_index(["state", "id"]).reindex(cur.index)
+            mask = pd.DataFrame(index=cur.index)
+            for c in fields:
+                now = cur[c].astype(object)
+                was = prev[c].astype(object) if c in getattr(prev, "columns", ()) else pd.Series(None, index=cur.index)
+                same = (now == was) | (now.isna() & was.isna())
+                mask[c] = ~same.fillna(False).astype(bool)
+            # only the entities with a change are visited
+            hit = mask.any(axis=1).to_numpy()
+            rows = cur.loc[hit, fields].reset_index().to_dict("records")
+            for row, flags in zip(rows, mask.to_numpy()[hit]):
+                state, ent = row["state"], row["id"]
+                changed = {c: _plain(row[c]) for c, flag in zip(fields, flags) if flag}
+                base = f"states/{state}" if kind == "states" else f"states/{state}/{kind}/{ent}"
+                out.append((f"{base}/history/{self.run_date}", {"run_date": self.run_date, **changed}))
+        return out
+
+
+def _plain(v):
+    """Parquet/pandas scalars -> values Firestore and JSON take."""
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.strftime("%Y-%m-%d")
+    if isinstance(v, np.integer):
+        return int(v)
+    if isinstance(v, np.floating):
+        return float(v)
+    return v
+
+
+# ----------------------------- Manifest -----------------------------
+def load_manifest(root: str) -> Dict[str, Any]:
+    path = os.path.join(root, "manifest.json")
+    if not os.path.exists(path):
+        return {"runs": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(root: str, manifest: Dict[str, Any]):
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, "manifest.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def previous_run(root: str, run_date: str) -> str | None:
+    earlier = [d for d in load_manifest(root)["runs"] if d < run_date]
+    return max(earlier) if earlier else None
+
+
+# ----------------------------- Queries -----------------------------
+def read_run(root: str, run_date: str | None, kind: str, states=None, filters=None) -> pd.DataFrame:
+    """One run's rows for `kind` (optionally only some states), with state and run_date columns."""
+    if run_date is None:
+        return pd.DataFrame()
+    files = load_manifest(root)["runs"].get(run_date, {}).get("files", {}).get(kind, {})
+    frames = []
+    for state, rel in sorted(files.items()):
+        if states is not None and state not in states:
+            continue
+        df = pd.read_parquet(os.path.join(root, rel), filters=filters)
+        df.insert(0, "state", state)
+        df.insert(0, "run_date", pd.Timestamp(run_date))
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def entity_history(root: str, kind: str, entity_id: str, state: str | None = None) -> pd.DataFrame:
+    """Every run's forecast for one entity; reads only that state's files, filtered on id."""
+    from tldr_schema import STATE_FIPS
+
+    entity_id = str(entity_id)
+    if kind == "counties":
+        entity_id = entity_id.zfill(5)
+        state = state or {v: k for k, v in STATE_FIPS.items()}.get(entity_id[:2])
+    elif kind == "states":
+        entity_id = state = entity_id.upper()
+    elif kind == "spas":
+        state = state or "CA"
+    frames = [read_run(root, run, kind, states={state}, filters=[("id", "==", entity_id)])
+              for run in sorted(load_manifest(root)["runs"])]
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def forecast_vs_observed(root: str, week_start: str, kind: str = "counties") -> pd.DataFrame:
+    """
+    Next-week forecasts issued for `week_start` next to the count later observed for it.
+    Only runs whose forecast / observed week ranges cover the week are opened.
+    """
+    week = pd.Timestamp(week_start)
+    runs = load_manifest(root)["runs"]
+
+    def covering(col):
+        return [d for d, r in sorted(runs.items())
+                if r.get(col) and pd.Timestamp(r[col][0]) <= week <= pd.Timestamp(r[col][1])]
+
+    def rows(col, value_col):
+        frames = [read_run(root, d, kind, filters=[(col, "==", week)]) for d in covering(col)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=["state", "id", value_col, f"{value_col}_run"])
+        df = pd.concat(frames, ignore_index=True).sort_values("run_date")
+        # the latest run that speaks about the week wins
+        df = df.drop_duplicates(["state", "id"], keep="last")
+        return df[["state", "id", value_col, "run_date"]].rename(columns={"run_date": f"{value_col}_run"})
+
+    fc = rows("next_week_start", "next_week_forecast")
+    ob = rows("last_obs_week_start", "last_obs_week_count")
+    out = fc.merge(ob, on=["state", "id"], how="outer")
+    out["error"] = out["next_week_forecast"].astype("Float64") - out["last_obs_week_count"].astype("Float64")
+    return out.sort_values(["state", "id"], ignore_index=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Query the forecast history written by seed_firestore.py --history-dir.")
+    ap.add_argument("--root", default="data/history", help="History dataset root")
+    ap.add_argument("--kind", choices=sorted(ID_COLUMNS), default="counties")
+    q = ap.add_mutually_exclusive_group(required=True)
+    q.add_argument("--id", help="Show every run's forecast for this geoid / state code / SPA id")
+    q.add_argument("--week", help="Forecast vs observed for the week starting on this date (YYYY-MM-DD)")
+    q.add_argument("--runs", action="store_true", help="List the recorded runs")
+    args = ap.parse_args()
+
+    with pd.option_context("display.width", 200, "display.max_columns", 30, "display.max_rows", 500):
+        if args.runs:
+            for d, run in sorted(load_manifest(args.root)["runs"].items()):
+                print(d, f"{run['rows']} rows", "forecast weeks", run.get("next_week_start"),
+                      "observed weeks", run.get("last_obs_week_start"))
+        elif args.id:
+            print(entity_history(args.root, args.kind, args.id))
+        else:
+            print(forecast_vs_observed(args.root, args.week, args.kind))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# local_backend.py
+# Offline stand-in for the Firestore client, so the seeder can run, be timed and
+# have its output diffed without credentials or a network.
+#
+# The seeder only uses a small slice of the client API, and this module covers
+# exactly that slice:
+#   db.collection(name).document(id)[.collection(name).document(id)...]
+#   ref.set(data, merge=True)
+#   db.batch() -> batch.set(ref, data, merge=True) / batch.delete(ref) / batch.commit()
+# Docs are kept by their full path ("states/CA/counties/06001") in a dict and,
+# when a path is given, mirrored into a SQLite file or dumped as JSON.
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, Tuple
+from urllib.parse import quote
+
+
+class LocalRef:
+    """Collection or document reference; just a path, like the real client's."""
+
+    def __init__(self, db: "LocalDB", path: str):
+        self._db = db
+        self.path = path
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> "LocalRef":
+        return LocalRef(self._db, f"{self.path}/{name}")
+
+    def document(self, doc_id: str) -> "LocalRef":
+        return LocalRef(self._db, f"{self.path}/{doc_id}")
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        batch = self._db.batch()
+        batch.set(self, data, merge=merge)
+        batch.commit()
+
+
+class LocalBatch:
+    """Buffers writes and applies them in one step on commit(), like a WriteBatch."""
+
+    def __init__(self, db: "LocalDB"):
+        self._db = db
+        self._writes = []  # (path, data or None for delete, merge)
+
+    def set(self, ref: LocalRef, data: Dict[str, Any], merge: bool = False):
+        self._writes.append((ref.path, dict(data), merge))
+
+    def delete(self, ref: LocalRef):
+        self._writes.append((ref.path, None, False))
+
+    def commit(self):
+        self._db._apply(self._writes)
+        self._writes = []
+
+
+class LocalDB:
+    """
+    In-process document store with the Firestore paths the seeder writes.
+    path=None keeps everything in memory; "*.json" is loaded on open and written on
+    close(); anything else is a SQLite file that every commit is written through to.
+    Commits are serialized, so it is safe to use from BatchCommitter's worker threads.
+    `read_only` opens an existing store for reading (replay, serving): commits are refused
+    and close() leaves the file exactly as it was.
+    """
+
+    def __init__(self, path: str | None = None, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._sql = None
+        if read_only and not (path and os.path.exists(path)):
+            raise FileNotFoundError(f"no local store at {path}")
+        if path and path.endswith(".json"):
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    self.docs = json.load(f)
+        elif path and read_only:
+            uri = f"file:{quote(os.path.abspath(path))}?mode=ro"
+            self._sql = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self.docs = {p: json.loads(d) for p, d in self._sql.execute("SELECT path, data FROM docs")}
+        elif path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._sql = sqlite3.connect(path, check_same_thread=False)
+            self._sql.execute("CREATE TABLE IF NOT EXISTS docs (path TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self.docs = {p: json.loads(d) for p, d in self._sql.execute("SELECT path, data FROM docs")}
+
+    def collection(self, name: str) -> LocalRef:
+        return LocalRef(self, name)
+
+    def document(self, path: str) -> LocalRef:
+        return LocalRef(self, path)
+
+    def batch(self) -> LocalBatch:
+        return LocalBatch(self)
+
+    def _apply(self, writes):
+        if self.read_only:
+            raise PermissionError(f"{self.path} was opened read-only")
+        with self._lock:
+            changed, deleted = {}, set()
+            for path, data, merge in writes:
+                if data is None:
+                    self.docs.pop(path, None)
+                    changed.pop(path, None)
+                    deleted.add(path)
+                    continue
+                # Our docs are flat, so a shallow update is what merge=True does to them
+                doc = {**self.docs.get(path, {}), **data} if merge else data
+                self.docs[path] = doc
+                changed[path] = doc
+                deleted.discard(path)
+            if self._sql is not None:
+                with self._sql:
+                    self._sql.executemany("DELETE FROM docs WHERE path = ?", [(p,) for p in deleted])
+                    self._sql.executemany(
+                        "INSERT OR REPLACE INTO docs (path, data) VALUES (?, ?)",
+                        [(p, json.dumps(d, sort_keys=True, default=str)) for p, d in changed.items()],
+                    )
+
+    def items(self, prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(path, doc) pairs in path order, optionally under one path prefix."""
+        for path in sorted(self.docs):
+            if path.startswith(prefix):
+                yield path, self.docs[path]
+
+    def close(self):
+        if self.path and self.path.endswith(".json") and not self.read_only:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.docs, f, sort_keys=True, indent=1, default=str)
+            os.replace(tmp, self.path)
+        if self._sql is not None:
+            self._sql.close()
+            self._sql = None
+
+
+def doc_ref(db, path: str):
+    """Walks 'states/CA/counties/06001' down from db; works for the real client and LocalDB."""
+    parts = path.split("/")
+    ref = db.collection(parts[0])
+    for i, part in enumerate(parts[1:]):
+        ref = ref.document(part) if i % 2 == 0 else ref.collection(part)
+    return ref
@@ -237,19 +237,37 @@
 import argparse
 import time
 from typing import Dict, Any, Iterable
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import cProfile
+import gzip
+import hashlib
+import heapq
+import pstats
+import random
 import re
 import json
 import os
 import sys
 
+import numpy as np
 import pandas as pd
-import firebase_admin
-from firebase_admin import credentials, firestore
-from google.oauth2 import service_account
+# firebase_admin / google.oauth2 pull in the whole gRPC stack, so they are imported
+# inside debug_sa() and init_db(), i.e. only by runs that actually write to Firestore.
+
+from forecast import MODELS, apply_county_forecasts, apply_state_forecasts, forecast_counties
+from forecast_history import HistoryRecorder
+from local_backend import LocalDB, doc_ref
+from static_store import StaticTreeDB
+from tldr_schema import COMPILED as SCHEMAS, DATE_FIELDS, NUMERIC_FIELDS, STATE_FIPS, SchemaError, validate
+from weekly_matrix import county_keys, load_weekly_matrix, norm_county, split_header, state_sums
 
 
 # ----------------------------- Utilities -----------------------------
 def debug_sa(sa_path: str):
+    from google.oauth2 import service_account
+
     with open(sa_path, "r", encoding="utf-8") as f:
         data = json.load(f)
     print("SA email:      ", data.get("client_email"))
@@ -263,13 +281,37 @@ def debug_sa(sa_path: str):
     print("Credentials object created OK (format looks valid)")
 
 
+def using_emulator() -> bool:
+    """True when FIRESTORE_EMULATOR_HOST points the client at a local emulator."""
+    return bool(os.environ.get("FIRESTORE_EMULATOR_HOST"))
+
+
 def init_db(sa_path: str):
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if using_emulator():
+        # the emulator takes any project id and no credentials
+        return firestore.Client(project=os.environ.get("GCLOUD_PROJECT", "demo-wildfire"))
     if not firebase_admin._apps:
         cred = credentials.Certificate(sa_path)
         firebase_admin.initialize_app(cred)
     return firestore.client()
 
 
+def open_db(args):
+    """Firestore, or a LocalDB for --backend memory/sqlite/static (no credentials or network needed)."""
+    if args.backend == "static":
+        return StaticTreeDB(args.static_dir, keep=args.static_keep)
+    if args.backend == "memory":
+        return LocalDB(args.local_db)
+    if args.backend == "sqlite":
+        return LocalDB(args.local_db or "data/.local_seed.sqlite")
+    if not using_emulator():
+        debug_sa(args.service_account)
+    return init_db(args.service_account)
+
+
 def chunked(iterable: Iterable, size: int):
     buf = []
     for x in iterable:
@@ -291,147 +333,1001 @@ def _slugify(name: str) -> str:
     return s or "spa"
 
 
+# ----------------------------- Metrics -----------------------------
+class Metrics:
+    """
+    Wall time, row counts and commit stats for one seeding run, per stage.
+    Stages nest (a load_* stage includes its read_csv time), so totals overlap.
+    Commits are recorded as they are acknowledged, with the slowest kept for the report.
+    """
+
+    SLOWEST = 10
+
+    def __init__(self):
+        self.started = time.time()
+        self.count_bytes = False  # payload sizes cost a json.dumps per doc; only when reporting
+        self.stages = {}   # name -> {"seconds", "calls", "rows"}
+        self.commits = {"batches": 0, "docs": 0, "bytes": 0, "retries": 0, "seconds": 0.0}
+        self.latencies = []
+        self._slowest = []  # min-heap of (seconds, label, docs, bytes, retries)
+
+    def _entry(self, name: str):
+        return self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "rows": 0})
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0):
+        """Times the block; yields the stage entry so rows can be added once they're known."""
+        e = self._entry(name)
+        e["rows"] += rows
+        t0 = time.perf_counter()
+        try:
+            yield e
+        finally:
+            e["seconds"] += time.perf_counter() - t0
+            e["calls"] += 1
+
+    def timed(self, name: str, frames: Iterable):
+        """Wraps a generator of frames, charging each next() and its rows to `name`."""
+        frames = iter(frames)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                frame = next(frames)
+            except StopIteration:
+                return
+            e = self._entry(name)
+            e["seconds"] += time.perf_counter() - t0
+            e["calls"] += 1
+            e["rows"] += len(frame)
+            yield frame
+
+    def record_commit(self, label: str, n_docs: int, n_bytes: int, retries: int, seconds: float):
+        c = self.commits
+        c["batches"] += 1
+        c["docs"] += n_docs
+        c["bytes"] += n_bytes
+        c["retries"] += retries
+        c["seconds"] += seconds
+        self.latencies.append(seconds)
+        item = (seconds, label, n_docs, n_bytes, retries)
+        if len(self._slowest) < self.SLOWEST:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+
+    def to_dict(self) -> Dict[str, Any]:
+        lat = np.asarray(self.latencies)
+        quantiles = {str(q): round(float(np.quantile(lat, q)), 4) for q in (0.5, 0.9, 0.99)} if lat.size else {}
+        return {
+            "started": self.started,
+            "seconds": round(time.time() - self.started, 3),
+            "stages": {k: {**v, "seconds": round(v["seconds"], 4)} for k, v in self.stages.items()},
+            "commits": {**self.commits, "seconds": round(self.commits["seconds"], 4),
+                        "latency_quantiles": quantiles},
+            "slowest_batches": [
+                {"label": label, "seconds": round(s, 4), "docs": d, "bytes": b, "retries": r}
+                for s, label, d, b, r in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def write_json(self, path: str):
+        _write_atomic(path, json.dumps(self.to_dict(), indent=1))
+
+    def write_prom(self, path: str):
+        """Prometheus textfile-collector format (node_exporter --collector.textfile)."""
+        d = self.to_dict()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP seed_{name} {help_text}")
+            lines.append(f"# TYPE seed_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"seed_{name}{labels} {value}")
+
+        metric("run_seconds", "gauge", "Wall time of the last seeding run.", [("", d["seconds"])])
+        metric("last_run_timestamp_seconds", "gauge", "Start time of the last seeding run.", [("", d["started"])])
+        for field, help_text in (("seconds", "Wall time per stage (stages nest)."),
+                                 ("calls", "Times each stage ran."),
+                                 ("rows", "Rows handled per stage.")):
+            metric(f"stage_{field}", "gauge", help_text,
+                   [(f'{{stage="{k}"}}', v[field]) for k, v in sorted(d["stages"].items())])
+        for field in ("batches", "docs", "bytes", "retries"):
+            metric(f"commit_{field}", "gauge", f"Committed {field} in the last run.", [("", d["commits"][field])])
+        metric("commit_latency_seconds", "gauge", "Batch commit latency quantiles, including retries.",
+               [(f'{{quantile="{q}"}}', v) for q, v in d["commits"]["latency_quantiles"].items()])
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+    def report(self):
+        d = self.to_dict()
+        print(f"\nStage timings ({d['seconds']}s total):")
+        for name, v in sorted(d["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+            print(f"  {name:<16} {v['seconds']:>9.3f}s  {v['rows']:>9} rows  {v['calls']:>5} calls")
+        if d["slowest_batches"]:
+            print("Slowest commits:")
+            for b in d["slowest_batches"][:3]:
+                print(f"  {b['seconds']:.3f}s  {b['label']} ({b['docs']} docs, {b['retries']} retries)")
+
+
+def _write_atomic(path: str, text: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# One per process; main() decides whether and where it gets written.
+METRICS = Metrics()
+
+
+# ----------------------------- Batch commit engine -----------------------------
+# Firestore error classes worth retrying (contention, throttling, transient outages).
+# Matched by name so we don't need google.api_core at import time.
+RETRYABLE_ERRORS = {
+    "Aborted",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "TooManyRequests",
+}
+
+
+def _is_retryable(exc: Exception) -> bool:
+    return type(exc).__name__ in RETRYABLE_ERRORS
+
+
+class BatchCommitter:
+    """
+    Commits write batches on a bounded pool of worker threads.
+
+    At most `max_inflight` batches are committing at any time; submit() blocks
+    once the window is full. Progress is reported in submission order, so the
+    log reads the same as the old sequential loop.
+    """
+
+    def __init__(self, max_inflight: int = 8, max_retries: int = 5, backoff: float = 0.5,
+                 verbose: bool = True, journal: "RunJournal | None" = None):
+        self.max_inflight = max(1, int(max_inflight))
+        self.verbose = verbose
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.journal = journal
+        self._pool = ThreadPoolExecutor(max_workers=self.max_inflight)
+        self._pending = deque()  # (label, n_docs, n_bytes, unit, seq, future) in submission order
+        self.batches = 0
+        self.docs = 0
+        self.retries = 0
+        self.skipped = 0  # batches a resumed run found already acknowledged
+        self.latencies = []  # seconds per acknowledged commit, including retries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        return False
+
+    def _commit(self, batch):
+        attempt = 0
+        t0 = time.perf_counter()
+        while True:
+            try:
+                batch.commit()
+                return attempt, time.perf_counter() - t0
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+                attempt += 1
+
+    def _ack_oldest(self):
+        label, n_docs, n_bytes, unit, seq, fut = self._pending.popleft()
+        with METRICS.stage("commit_wait", rows=n_docs):
+            retries, latency = fut.result()  # re-raises a failed commit
+        if seq is not None:
+            self.journal.ack(unit, seq)
+        self.latencies.append(latency)
+        METRICS.record_commit(label, n_docs, n_bytes, retries, latency)
+        self.batches += 1
+        self.docs += n_docs
+        self.retries += retries
+        if self.verbose:
+            note = f" after {retries} retries" if retries else ""
+            print(f"  committed {label} ({n_docs} docs){note}")
+
+    def submit(self, batch, n_docs: int, label: str = "batch", n_bytes: int = 0, unit: str | None = None):
+        """
+        Queues `batch` for commit. Batches submitted under a journal `unit` are numbered in
+        order; one the journal already has acknowledged (on --resume) is dropped unsent.
+        """
+        seq = None
+        if unit is not None and self.journal is not None:
+            seq, done = self.journal.next(unit)
+            if done:
+                self.skipped += 1
+                if self.verbose:
+                    print(f"  already committed {label} ({n_docs} docs), skipping")
+                return
+        while len(self._pending) >= self.max_inflight:
+            self._ack_oldest()
+        self._pending.append((label, n_docs, n_bytes, unit, seq, self._pool.submit(self._commit, batch)))
+
+    def drain(self):
+        while self._pending:
+            self._ack_oldest()
+
+    def close(self):
+        try:
+            self.drain()
+        finally:
+            self._pool.shutdown(wait=True)
+
+
+# ----------------------------- Delta snapshot -----------------------------
+def _content_hash(rec: Dict[str, Any]) -> str:
+    """Stable hash of a doc payload; the per-run `updated_at` stamp is ignored."""
+    body = {k: v for k, v in rec.items() if k != "updated_at"}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class PushSnapshot:
+    """
+    Content hashes of the docs we last pushed, persisted as JSON:
+      {"states": {"CA": h}, "counties": {"CA/06037": h}, "spas": {"CA/antelope-valley": h}}
+    In delta mode, changed() is False for docs whose hash matches the snapshot,
+    and stale() lists docs that were pushed before but are gone from the inputs.
+    """
+
+    KINDS = ("states", "counties", "spas")
+
+    def __init__(self, path: str | None, delta: bool = False):
+        self.path = path
+        self.delta = delta
+        prev = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                prev = json.load(f)
+        self.prev = {k: dict(prev.get(k, {})) for k in self.KINDS}
+        self.next = {k: dict(self.prev[k]) for k in self.KINDS}
+        self.seen = {k: set() for k in self.KINDS}
+        self.counts = {k: dict.fromkeys(("insert", "update", "unchanged", "delete"), 0) for k in self.KINDS}
+
+    def changed(self, kind: str, key: str, rec: Dict[str, Any]) -> bool:
+        h = _content_hash(rec)
+        old = self.prev[kind].get(key)
+        self.seen[kind].add(key)
+        self.next[kind][key] = h
+        if old is None:
+            self.counts[kind]["insert"] += 1
+            return True
+        if old != h:
+            self.counts[kind]["update"] += 1
+            return True
+        self.counts[kind]["unchanged"] += 1
+        return not self.delta
+
+    def stale(self, kind: str, scope: str | None = None) -> list:
+        """Keys pushed last time but not seen this run (optionally limited to one state)."""
+        return sorted(
+            k for k in self.prev[kind]
+            if k not in self.seen[kind] and (scope is None or k == scope or k.startswith(scope + "/"))
+        )
+
+    def forget(self, kind: str, key: str):
+        self.next[kind].pop(key, None)
+        self.counts[kind]["delete"] += 1
+
+    def summary(self) -> str:
+        return "; ".join(
+            f"{k}: +{c['insert']} ~{c['update']} ={c['unchanged']} -{c['delete']}"
+            for k, c in self.counts.items()
+        )
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.next, f, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+# ----------------------------- Run journal -----------------------------
+def _file_hash(path: str | None) -> str | None:
+    if not path or not os.path.exists(path):
+        return None
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class RunJournal:
+    """
+    How far the current run got, persisted as JSON after every acknowledged batch:
+      {"inputs": {...}, "run_date": "2025-10-13", "complete": false,
+       "acked": {"counties/CA": 7, "states/CA": 1, "spas/CA": 2, "stale": 1}}
+    `inputs` holds the content hashes of the input files plus the options that decide which
+    batches get built, so the same inputs rebuild the same numbered batches per unit. The
+    committer acknowledges in submission order, so "counties/CA": 7 means batches 1-7 of
+    CA's counties are durably written. With `resume`, a matching unfinished journal turns
+    those batches into no-ops; anything else starts the run over.
+    """
+
+    def __init__(self, path: str, inputs: Dict[str, Any], resume: bool = False):
+        self.path = path
+        self.inputs = inputs
+        self.run_date = None
+        self.done = {}
+        if resume and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                prev = json.load(f)
+            if prev.get("complete"):
+                print("  (--resume: the journaled run finished; seeding everything)")
+            elif prev.get("inputs") != inputs:
+                print("  (--resume: inputs or options changed since the journaled run; seeding everything)")
+            else:
+                self.done = dict(prev.get("acked", {}))
+                self.run_date = prev.get("run_date")
+                print(f"  (--resume: skipping {sum(self.done.values())} batches already committed)")
+        elif resume:
+            print(f"  (--resume: no journal at {path}; seeding everything)")
+        self.acked = dict(self.done)
+        self.seq = {}
+        self.complete = False
+
+    def next(self, unit: str) -> tuple:
+        """(number of this unit's next batch, whether the journaled run already committed it)."""
+        n = self.seq.get(unit, 0) + 1
+        self.seq[unit] = n
+        return n, n <= self.done.get(unit, 0)
+
+    def ack(self, unit: str, n: int):
+        self.acked[unit] = max(n, self.acked.get(unit, 0))
+        self.save()
+
+    def finish(self):
+        self.complete = True
+        self.save()
+
+    def save(self):
+        _write_atomic(self.path, json.dumps({
+            "inputs": self.inputs,
+            "run_date": self.run_date,
+            "complete": self.complete,
+            "acked": self.acked,
+        }, sort_keys=True))
+
+
+def run_inputs(args) -> Dict[str, Any]:
+    """What a resumed run must share with the journaled one for its batches to line up."""
+    files = {"states": args.states_csv, "counties": args.counties_csv, "spas": args.spa_csv,
+             "weekly": args.weekly_csv, "replay": args.replay}
+    return {
+        "files": {name: _file_hash(path) for name, path in files.items()},
+        # delta runs skip what the snapshot says is unchanged, so its content picks the batches too
+        "snapshot": _file_hash(args.snapshot) if args.delta else None,
+        "options": {k: getattr(args, k) for k in (
+            "only_state", "chunksize", "delta", "allow_bad_rows", "forecast_model", "hoist_periods",
+            "backend", "local_db",
+            "history_dir", "history_firestore", "run_date", "replay")},
+    }
+
+
 # ----------------------------- Firestore upserters -----------------------------
-def upsert_state_doc(db, state: str, fields: Dict[str, Any]):
+def upsert_state_doc(db, state: str, fields: Dict[str, Any],
+                     committer: BatchCommitter | None = None,
+                     snapshot: PushSnapshot | None = None):
     """
     Upserts the state TLDR fields DIRECTLY on states/{STATE}.
     No subcollection/subdocument.
+    With a committer, the write rides the commit pipeline as a one-doc batch.
     """
     state = state.upper()
+    if snapshot is not None and not snapshot.changed("states", state, fields):
+        return
     state_ref = db.collection("states").document(state)
+    if committer is not None:
+        batch = db.batch()
+        rec = {"state": state, **fields}
+        batch.set(state_ref, rec, merge=True)
+        committer.submit(batch, 1, f"{state} state doc", _payload_bytes(rec), unit=f"states/{state}")
+        return
     state_ref.set({"state": state}, merge=True)  # ensure exists
     state_ref.set(fields, merge=True)
 
 
-def upsert_counties(db, state: str, rows: pd.DataFrame, batch_size: int = 450):
-    """Upserts all county docs under states/{STATE}/counties/{GEOID}."""
+def _payload_bytes(rec: Dict[str, Any]) -> int:
+    """Approximate wire size of a doc (its JSON length); 0 unless metrics are being reported."""
+    if not METRICS.count_bytes:
+        return 0
+    return len(json.dumps(rec, default=str))
+
+
+def _write_payloads(db, coll, kind: str, state: str, payloads, batch_size: int,
+                    committer: BatchCommitter, snapshot: PushSnapshot | None, merge: bool = True,
+                    chunk_no: int | None = None):
+    """
+    Chunks (doc_id, payload) pairs into batches on `coll` and hands them to the committer.
+    `chunk_no` is the CSV chunk the payloads came from (--chunksize), to keep batch labels unique.
+    """
+    now = int(time.time())
+    prefix = f"{state} {kind}" + (f" chunk {chunk_no}" if chunk_no is not None else "")
+
+    def writes():
+        for doc_id, rec in payloads:
+            if snapshot is not None and not snapshot.changed(kind, f"{state}/{doc_id}", rec):
+                continue
+            rec.setdefault("updated_at", now)
+            yield doc_id, rec
+
+    for i, chunk in enumerate(chunked(writes(), batch_size), 1):
+        batch = db.batch()
+        n_bytes = 0
+        for doc_id, rec in chunk:
+            batch.set(coll.document(doc_id), rec, merge=merge)
+            n_bytes += _payload_bytes(rec)
+        committer.submit(batch, len(chunk), f"{prefix} batch {i}", n_bytes, unit=f"{kind}/{state}")
+
+
+def upsert_counties(db, state: str, rows: pd.DataFrame, batch_size: int = 450,
+                    committer: BatchCommitter | None = None,
+                    snapshot: PushSnapshot | None = None,
+                    periods: Dict[str, Dict[str, str]] | None = None,
+                    chunk_no: int | None = None):
+    """
+    Upserts all county docs under states/{STATE}/counties/{GEOID}.
+    Batches are handed to `committer` (a private one is used and drained if None).
+    With a delta `snapshot`, unchanged counties are skipped.
+    With `periods` ({STATE: shared period dates}, filled in here), dates shared across the
+    state are left off the docs, which are then replaced whole so no stale date survives.
+    `chunk_no` numbers the batch labels of one CSV chunk when streaming.
+    """
     if rows is None or rows.empty:
         return
+    if committer is None:
+        with BatchCommitter(max_inflight=1) as own:
+            return upsert_counties(db, state, rows, batch_size, own, snapshot, periods, chunk_no)
     state = state.upper()
     coll = db.collection("states").document(state).collection("counties")
-
-    # guarantee strings for ids
-    rows = rows.copy()
-    rows["geoid"] = rows["geoid"].astype(str).str.zfill(5)
-
-    for chunk in chunked(rows.to_dict(orient="records"), batch_size):
-        batch = db.batch()
-        for rec in chunk:
-            geoid = rec.pop("geoid")
-
-            # normalize some helpful fields
-            rec["state"] = state
-            if "county_name" in rec:
-                rec["county_name"] = str(rec["county_name"])
-
-            # explicit ints for numeric-ish fields if present
-            for k in (
-                "last_week_count",
-                "last_month_count",
-                "next_week_forecast",
-                "next_month_forecast",
-                "total_to_date",
-                "total_tilldate",
-            ):
-                if k in rec and rec[k] is not None and rec[k] != "":
-                    try:
-                        rec[k] = int(rec[k])
-                    except Exception:
-                        pass
-
-            rec.setdefault("updated_at", int(time.time()))
-            batch.set(coll.document(geoid), rec, merge=True)
-        batch.commit()
-
-
-def upsert_spas(db, state: str, spa_rows: pd.DataFrame, batch_size: int = 450):
+    with METRICS.stage("normalize", rows=len(rows)):
+        payloads = to_payloads(rows, "counties", state)
+        if periods is not None:
+            periods[state] = hoist_periods(payloads, periods.get(state))
+    _write_payloads(db, coll, "counties", state, payloads, batch_size, committer, snapshot,
+                    merge=periods is None, chunk_no=chunk_no)
+
+
+def upsert_spas(db, state: str, spa_rows: pd.DataFrame, batch_size: int = 450,
+                committer: BatchCommitter | None = None,
+                snapshot: PushSnapshot | None = None,
+                periods: Dict[str, Dict[str, str]] | None = None,
+                chunk_no: int | None = None):
     """
     Writes each SPA row to: states/{state}/spas/{spa_id}
     NOTE: Per your request, SPA rows are always forced to state='CA' and county_name='Losangles'.
+    `periods` and `chunk_no` work as in upsert_counties().
     """
     if spa_rows is None or spa_rows.empty:
         return
-
-    # Force CA + Losangles regardless of input
-    spa_rows = spa_rows.copy()
-    spa_rows["state"] = "CA"
-    if "county_name" not in spa_rows.columns or spa_rows["county_name"].eq("").all():
-        spa_rows["county_name"] = "Losangles"
+    if committer is None:
+        with BatchCommitter(max_inflight=1) as own:
+            return upsert_spas(db, state, spa_rows, batch_size, own, snapshot, periods, chunk_no)
 
     coll = db.collection("states").document("CA").collection("spas")
+    with METRICS.stage("normalize", rows=len(spa_rows)):
+        payloads = to_payloads(spa_rows, "spas", "CA")
+        if periods is not None:
+            periods["CA"] = hoist_periods(payloads, periods.get("CA"))
+    _write_payloads(db, coll, "spas", "CA", payloads, batch_size, committer, snapshot,
+                    merge=periods is None, chunk_no=chunk_no)
+
+
+def _shared_date(counts: Counter) -> str:
+    """The date to hoist from a field's value counts ("" if none is worth it)."""
+    top = counts.most_common(1)
+    # a date carried by a single doc saves nothing by moving
+    return top[0][0] if top and top[0][0] and top[0][1] > 1 else ""
+
+
+def period_counts(df: pd.DataFrame, counts: Dict[str, Dict[str, Counter]],
+                  state: str | None = None) -> Dict[str, Dict[str, Counter]]:
+    """
+    Adds a frame's period dates, formatted as the docs store them, to `counts`
+    ({STATE: {field: Counter}}), so a streamed file's shared dates can be known up front.
+    """
+    if df is None or df.empty:
+        return counts
+    cols = [c for c in DATE_FIELDS if c in df.columns]
+    frame = _format_dates(df[cols].copy())
+    frame["state"] = state.upper() if state else df["state"].astype(str).to_numpy()
+    for st, rows in frame.groupby("state", sort=False):
+        by_field = counts.setdefault(st, {f: Counter() for f in DATE_FIELDS})
+        for f in DATE_FIELDS:
+            by_field[f].update(rows[f].value_counts().to_dict() if f in cols else {"": len(rows)})
+    return counts
+
+
+def shared_periods(counts: Dict[str, Dict[str, Counter]]) -> Dict[str, Dict[str, str]]:
+    """{STATE: {field: date}} to hoist, from period_counts() over every chunk of a file."""
+    return {st: {f: _shared_date(c) for f, c in by_field.items()} for st, by_field in counts.items()}
 
-    for chunk in chunked(spa_rows.to_dict(orient="records"), batch_size):
+
+def hoist_periods(payloads: list, shared: Dict[str, str] | None = None) -> Dict[str, str]:
+    """
+    Drops the period dates a partition's docs have in common from each payload, in place,
+    and returns them as {field: date} ("" for fields that stay on the docs). Each field's
+    most common date is shared, unless `shared` already fixes them (from the whole state,
+    when streaming); docs keep the dates that differ, as overrides.
+    """
+    if shared is None:
+        shared = {f: _shared_date(Counter(rec.get(f, "") for _, rec in payloads)) for f in DATE_FIELDS}
+    for _, rec in payloads:
+        for f, v in shared.items():
+            if v and rec.get(f) == v:
+                del rec[f]
+    return shared
+
+
+def delete_stale(db, snapshot: PushSnapshot, committer: BatchCommitter,
+                 scope: str | None = None, batch_size: int = 450):
+    """Deletes docs that were in the last push but are no longer in the inputs."""
+    def refs():
+        for kind in ("counties", "spas", "states"):
+            for key in snapshot.stale(kind, scope):
+                state, _, doc_id = key.partition("/")
+                ref = db.collection("states").document(state)
+                if doc_id:
+                    ref = ref.collection(kind).document(doc_id)
+                snapshot.forget(kind, key)
+                yield ref
+
+    for i, chunk in enumerate(chunked(refs(), batch_size), 1):
+        batch = db.batch()
+        for ref in chunk:
+            batch.delete(ref)
+        committer.submit(batch, len(chunk), f"stale docs delete batch {i}", unit="stale")
+
+
+def write_history_deltas(db, deltas, committer: BatchCommitter, batch_size: int = 450):
+    """Writes (path, changed fields) pairs as .../history/{run_date} docs next to each entity."""
+    for i, chunk in enumerate(chunked(deltas, batch_size), 1):
         batch = db.batch()
-        for rec in chunk:
-            spa_id = rec.get("spa_id") or _slugify(rec.get("spa_name", "spa"))
-
-            # Normalize types for numericish fields
-            for k in (
-                "total_till_date",
-                "last_obs_week_count",
-                "last_obs_month_count",
-                "next_week_forecast",
-                "next_month_forecast",
-            ):
-                if k in rec and rec[k] not in (None, ""):
-                    try:
-                        rec[k] = int(rec[k])
-                    except Exception:
-                        pass
-
-            rec["state"] = "CA"
-            rec.setdefault("county_name", "Losangles")
-            rec.setdefault("updated_at", int(time.time()))
-            batch.set(coll.document(spa_id), rec, merge=True)
-        batch.commit()
+        n_bytes = 0
+        for path, fields in chunk:
+            batch.set(doc_ref(db, path), fields)
+            n_bytes += _payload_bytes(fields)
+        committer.submit(batch, len(chunk), f"history batch {i}", n_bytes, unit="history")
+
+
+def replay_writes(src: LocalDB, snapshot: PushSnapshot | None = None):
+    """(path, rec, is_history) for each doc of a local run that replay() would push."""
+    for path, rec in src.items("states/"):
+        parts = path.split("/")
+        history = parts[-2] == "history"
+        if snapshot is not None and not history:
+            kind, key = ("states", parts[1]) if len(parts) == 2 else (parts[2], f"{parts[1]}/{parts[3]}")
+            if not snapshot.changed(kind, key, rec):
+                continue
+        yield path, rec, history
+
+
+def replay(src: LocalDB, db, committer: BatchCommitter, snapshot: PushSnapshot | None = None,
+           batch_size: int = 450):
+    """
+    Pushes every doc of a local run into `db` as-is (same paths). Merge writes, unless the run
+    hoisted its period dates (--hoist-periods), whose county/SPA docs must replace the old ones.
+    `history/{run_date}` docs (--history-firestore) are replaced whole, as the seeder writes
+    them, and stay out of the push snapshot, which only tracks the entity docs.
+    """
+    merge = not any("county_periods" in rec or "spa_periods" in rec for _, rec in src.items("states/"))
+    for i, chunk in enumerate(chunked(replay_writes(src, snapshot), batch_size), 1):
+        batch = db.batch()
+        n_bytes = 0
+        for path, rec, history in chunk:
+            batch.set(doc_ref(db, path), rec, merge=not history and (merge or path.count("/") == 1))
+            n_bytes += _payload_bytes(rec)
+        committer.submit(batch, len(chunk), f"replay batch {i}", n_bytes, unit="replay")
+
+
+# ----------------------------- Record normalization -----------------------------
+# Column types, aliases and validation rules live in tldr_schema.py.
+
+# Per entity: doc id column, zero-pad width for the id, whether the id stays in the payload.
+ENTITY_IDS = {
+    "states":   ("state", 0, True),
+    "counties": ("geoid", 5, False),
+    "spas":     ("spa_id", 0, True),
+}
+
+
+def _coerce_numeric(df: pd.DataFrame, nullable: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Coerces NUMERIC_FIELDS present in `df` to int64 in place (bad/blank -> 0).
+    Columns listed in `nullable` become Int64 with <NA> for blanks instead.
+    Columns that are already integer are left alone, so this is cheap to repeat.
+    """
+    for c in NUMERIC_FIELDS:
+        if c not in df.columns or pd.api.types.is_integer_dtype(df[c]):
+            continue
+        num = pd.to_numeric(df[c], errors="coerce")
+        df[c] = num.round().astype("Int64") if c in nullable else num.fillna(0).round().astype("int64")
+    return df
+
+
+def _format_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """Parsed period dates back to the 'YYYY-MM-DD' strings the docs store ('' for blanks)."""
+    for c in DATE_FIELDS:
+        if c not in df.columns:
+            continue
+        if pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = df[c].dt.strftime("%Y-%m-%d").fillna("")
+        elif df[c].dtype == object:
+            # mixed columns (state fields patched from rollups) are small; go value by value
+            df[c] = [v.strftime("%Y-%m-%d") if isinstance(v, pd.Timestamp) else ("" if pd.isna(v) else v)
+                     for v in df[c]]
+    return df
+
+
+def to_payloads(df: pd.DataFrame, kind: str, state: str | None = None) -> list:
+    """
+    Turns a loaded frame into write-ready (doc_id, payload) pairs in one columnar pass:
+    ints fixed, dates formatted, ids stringified/zero-padded, state forced, then one to_dict().
+    """
+    id_col, pad, keep_id = ENTITY_IDS[kind]
+    df = _format_dates(_coerce_numeric(df.copy()))
+
+    if kind == "spas":
+        # Force CA + Losangles regardless of input
+        slug = df["spa_name"].map(_slugify) if "spa_name" in df.columns else "spa"
+        ids = df[id_col].astype(str) if id_col in df.columns else pd.Series("", index=df.index)
+        df[id_col] = ids.where(ids != "", slug)
+        if "county_name" not in df.columns or df["county_name"].eq("").all():
+            df["county_name"] = "Losangles"
+    elif "county_name" in df.columns:
+        df["county_name"] = df["county_name"].astype(str)
+
+    ids = df[id_col].astype(str)
+    if pad:
+        ids = ids.str.zfill(pad)
+    if keep_id:
+        df[id_col] = ids
+    else:
+        df = df.drop(columns=[id_col])
+    if state is not None:
+        df["state"] = state.upper()
+    return list(zip(ids.tolist(), df.to_dict(orient="records")))
+
+
+# State fields rolled up from county rows: counts are summed, period dates take the latest.
+# The loaders have already mapped older column names onto these (see tldr_schema.py).
+ROLLUP_SUMS = (
+    "total_till_date",
+    "last_obs_week_count",
+    "last_obs_month_count",
+    "next_week_forecast",
+    "next_month_forecast",
+)
+ROLLUP_LATEST = DATE_FIELDS
+
+
+def _rollup_agg(columns) -> Dict[str, str]:
+    return {c: ("sum" if c in ROLLUP_SUMS else "max") for c in columns}
+
+
+def rollup_counties(df: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Per-state rollups of a county frame (sums + latest dates) in one groupby pass."""
+    if df is None or df.empty:
+        return None
+    cols = [c for c in (*ROLLUP_SUMS, *ROLLUP_LATEST) if c in df.columns]
+    if not cols:
+        return None
+    frame = df[cols].copy()
+    frame["state"] = df["state"].astype(str)
+    return frame.groupby("state").agg(_rollup_agg(cols))
+
+
+def merge_rollups(a: pd.DataFrame | None, b: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Combines rollups of two county chunks (sums add up, dates keep the latest)."""
+    if a is None or b is None:
+        return a if b is None else b
+    both = pd.concat([a, b])
+    return both.groupby(level=0).agg(_rollup_agg(both.columns))
+
+
+def build_state_fields(states_df: pd.DataFrame | None, all_states: Iterable[str],
+                       rollups: pd.DataFrame | None = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Assembles the TLDR fields for every states/{STATE} doc with column operations.
+    Any count or period date the states CSV leaves blank is filled from the county `rollups`.
+    """
+    index = pd.Index(sorted(all_states), name="state")
+    meta = pd.DataFrame(index=index)
+    if states_df is not None and "state" in states_df.columns:
+        meta = (states_df.assign(state=states_df["state"].astype(str).str.upper())
+                .drop_duplicates("state").set_index("state").reindex(index))
+
+    roll = rollups.reindex(index) if rollups is not None else pd.DataFrame(index=index)
+
+    def col(name, default):
+        own = meta[name].astype(object) if name in meta.columns else pd.Series(pd.NA, index=index, dtype=object)
+        if name in roll.columns:
+            own = own.mask(own.isna() | own.eq(""), roll[name])
+        return own.fillna(default)
+
+    out = pd.DataFrame({
+        "state_name": col("state_name", ""),
+        "last_obs_week_start": col("last_obs_week_start", ""),
+        "last_obs_week_end": col("last_obs_week_end", ""),
+        "last_obs_week_count": col("last_obs_week_count", 0),
+        "last_obs_month_start": col("last_obs_month_start", ""),
+        "last_obs_month_end": col("last_obs_month_end", ""),
+        "last_obs_month_count": col("last_obs_month_count", 0),
+        "next_week_start": col("next_week_start", ""),
+        "next_week_end": col("next_week_end", ""),
+        "next_week_forecast": col("next_week_forecast", 0),
+        "next_month_start": col("next_month_start", ""),
+        "next_month_end": col("next_month_end", ""),
+        "next_month_forecast": col("next_month_forecast", 0),
+        "total_till_date": col("total_till_date", 0),
+        "total_to_date": col("total_to_date", 0),
+        "color": col("color", ""),
+    }, index=index)
+    out = _coerce_numeric(out.reset_index())
+    out["updated_at"] = int(time.time())
+    out["source"] = "seed_script_v2"
+    return dict(to_payloads(out, "states"))
+
+
+# ----------------------------- Rankings -----------------------------
+# YoY lift compares the latest week with the same week a year earlier (app.js: vals[n-1] - vals[n-53]).
+YOY_WEEKS = 52
+RANK_FIELDS = ("rank", "rank_tier", "yoy_lift", "yoy_rank", "yoy_tier")
+# app.js drops a state/county doc with none of these above zero, so it's left out of the ranks too
+LIVE_FIELDS = ("total_till_date", "last_obs_week_count", "last_obs_month_count",
+               "next_week_forecast", "next_month_forecast")
+
+
+def _tiers(rank: pd.Series) -> np.ndarray:
+    """Top-10 color tiers by rank: 1-3 r, 4-6 y, 7-10 g, everything else ""."""
+    return np.select([rank <= 3, rank <= 6, rank <= 10], ["r", "y", "g"], "")
+
+
+def _live(df: pd.DataFrame) -> pd.Series:
+    """True for the rows app.js keeps: any LIVE_FIELDS value above zero."""
+    live = pd.Series(False, index=df.index)
+    for c in LIVE_FIELDS:
+        if c in df.columns:
+            live |= pd.to_numeric(df[c], errors="coerce").gt(0)
+    return live
+
+
+def _ranked(totals: pd.Series, lifts: pd.Series, by=None, live: pd.Series | None = None) -> pd.DataFrame:
+    """
+    Rank/tier columns for totals and YoY lifts (optionally ranked within `by` groups), as
+    app.js ranks them: over `live` rows only, missing totals as 0, missing lifts unranked.
+    """
+    def rank(v):
+        if live is not None:
+            v = v.where(live)
+        r = v.groupby(by).rank(method="first", ascending=False) if by is not None else \
+            v.rank(method="first", ascending=False)
+        return r
+
+    r = rank(pd.to_numeric(totals, errors="coerce").fillna(0))
+    yr = rank(pd.to_numeric(lifts, errors="coerce"))
+    out = pd.DataFrame({
+        "rank": r.astype("Int64"),
+        "rank_tier": _tiers(r),
+        "yoy_lift": pd.to_numeric(lifts, errors="coerce").round().astype("Int64"),
+        "yoy_rank": yr.astype("Int64"),
+        "yoy_tier": _tiers(yr),
+    }, index=totals.index)
+    # Firestore/JSON want None, not <NA>
+    return out.astype(object).where(out.notna(), None)
+
+
+def yoy_lifts(weekly) -> tuple:
+    """
+    ({STATE: lift}, {STATE: {county_key: lift}}) from a load_weekly_matrix() result;
+    empty when there is less than a year and a week of history.
+    """
+    if weekly is None:
+        return {}, {}
+    weeks, headers, values = weekly
+    if len(weeks) <= YOY_WEEKS:
+        return {}, {}
+    states = {code: s[-1] - s[-1 - YOY_WEEKS] for code, s in state_sums(headers, values).items()}
+    lift = values[-1] - values[-1 - YOY_WEEKS]
+    counties: Dict[str, Dict[str, float]] = {}
+    for i, h in enumerate(headers):
+        code, county = split_header(h)
+        for k in county_keys(county):
+            counties.setdefault(code, {})[k] = lift[i]
+    return states, counties
+
+
+def state_rankings(state_fields_by_state: Dict[str, Dict[str, Any]], weekly=None) -> Dict[str, Dict[str, Any]]:
+    """National rank + YoY tiers for every state doc (in doc id order, like app.js sees them)."""
+    state_lift, _ = yoy_lifts(weekly)
+    fields = pd.DataFrame.from_dict(state_fields_by_state, orient="index").reindex(sorted(state_fields_by_state))
+    totals = fields["total_till_date"] if "total_till_date" in fields.columns else pd.Series(0, index=fields.index)
+    lifts = pd.Series(state_lift, dtype="float64").reindex(fields.index)
+    return _ranked(totals, lifts, live=_live(fields)).to_dict(orient="index")
+
+
+def county_rank_inputs(counties_df: pd.DataFrame, county_lift: Dict[str, Dict[str, float]]) -> pd.DataFrame:
+    """
+    The narrow columns county ranking needs (state, geoid, total, YoY lift, whether app.js
+    shows it), so a streamed run can hold every county's inputs without holding its rows.
+    """
+    df = counties_df.reset_index(drop=True)
+    state = df["state"].astype(str)
+    totals = df["total_till_date"] if "total_till_date" in df.columns else pd.Series(0, index=df.index)
+    lifts = pd.Series(np.nan, index=df.index)
+    if county_lift and "county_name" in df.columns:
+        keys = df["county_name"].map(norm_county)
+        lifts = pd.Series([county_lift.get(s, {}).get(k, np.nan) for s, k in zip(state, keys)], index=df.index)
+    return pd.DataFrame({
+        "state": state.astype("category"),
+        "geoid": df["geoid"].astype(str).str.zfill(5),
+        "total": pd.to_numeric(totals, errors="coerce").fillna(0).astype("int64"),
+        "lift": lifts.astype("float64"),
+        "live": _live(df).to_numpy(),
+    })
+
+
+def rank_counties(inputs: pd.DataFrame) -> pd.DataFrame:
+    """Rank + YoY tiers of each county within its state, indexed by zero-padded geoid."""
+    # ties go to the lower geoid, as in app.js (which sees a state's counties in doc id order)
+    inputs = inputs.sort_values("geoid", kind="stable")
+    out = _ranked(inputs["total"], inputs["lift"], by=inputs["state"].astype(str), live=inputs["live"])
+    out.index = inputs["geoid"]
+    return out[~out.index.duplicated()]
+
+
+def county_rankings(counties_df: pd.DataFrame, weekly=None) -> pd.DataFrame:
+    """rank_counties() over a whole counties frame."""
+    _, county_lift = yoy_lifts(weekly)
+    return rank_counties(county_rank_inputs(counties_df, county_lift))
+
+
+def attach_rankings(rows: pd.DataFrame, rankings: pd.DataFrame | None) -> pd.DataFrame:
+    """Adds the precomputed RANK_FIELDS to a county partition (matched on geoid)."""
+    if rankings is None or rows.empty:
+        return rows
+    ranks = rankings.reindex(rows["geoid"].astype(str).str.zfill(5))
+    rows = rows.copy()
+    for c in RANK_FIELDS:
+        rows[c] = ranks[c].to_numpy()
+    return rows
 
 
 # ----------------------------- CSV loading -----------------------------
-def _read_csv(path: str | None) -> pd.DataFrame | None:
+# SPA output columns (anything else in the SPA CSV is dropped).
+SPA_COLUMNS = [
+    "spa_id",
+    "spa_name",
+    "state",          # will be forced to "CA" in upsert
+    "county_name",    # will be forced to "Losangles" in upsert
+    "color",
+    "total_till_date",
+    "last_obs_week_start",
+    "last_obs_week_end",
+    "last_obs_week_count",
+    "last_obs_month_start",
+    "last_obs_month_end",
+    "last_obs_month_count",
+    "next_week_start",
+    "next_week_end",
+    "next_week_forecast",
+    "next_month_start",
+    "next_month_end",
+    "next_month_forecast",
+]
+
+
+def _typed_options(header) -> Dict[str, Any]:
+    """read_csv options that parse NUMERIC_FIELDS as float64 and keep everything else a string."""
+    numeric = [c for c in header if c in NUMERIC_FIELDS]
+    return {"dtype": {c: ("float64" if c in numeric else str) for c in header},
+            "keep_default_na": False, "na_values": {c: [""] for c in numeric}}
+
+
+def _read_csv(path: str | None, chunksize: int | None = None, usecols=None):
+    """
+    Whole-file read or, with `chunksize`, a generator of chunks. Count columns are parsed as
+    float64 and the rest as strings (blanks -> ""), so only the columns kept are read and
+    numbers never pass through a string copy. A file whose counts don't parse is re-read as
+    all strings from the failing chunk on, so the schemas in tldr_schema.py can point at the
+    offending line.
+    """
     if not path:
         return None
-    df = pd.read_csv(path, dtype=str).fillna("")
+    if chunksize:
+        return METRICS.timed("read_csv", _stream_csv(path, chunksize, usecols))
+    with METRICS.stage("read_csv") as st:
+        header = pd.read_csv(path, nrows=0).columns
+        try:
+            df = pd.read_csv(path, **_typed_options(header))
+        except ValueError:
+            df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        st["rows"] += len(df)
     return df
 
 
-def load_counties_csv(path: str) -> pd.DataFrame:
-    df = _read_csv(path)
-    if df is None:
-        raise ValueError("counties CSV path is required")
+def _stream_csv(path: str, chunksize: int, usecols=None):
+    header = pd.read_csv(path, nrows=0).columns
+    if usecols is not None:
+        header = [c for c in header if usecols(c)]
+    done = 0
+    try:
+        for chunk in pd.read_csv(path, usecols=header, chunksize=chunksize, **_typed_options(header)):
+            done += len(chunk)
+            yield chunk
+        return
+    except ValueError:
+        pass
+    # keep the original row numbers in the index; the schema reports lines from it
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, usecols=header,
+                             chunksize=chunksize, skiprows=range(1, done + 1)):
+        chunk.index += done
+        yield chunk
 
-    # Basic columns (we don't force all TLDR cols; we just pass through if present)
-    for need in ["state", "geoid"]:
-        if need not in df.columns:
-            raise ValueError(f"counties CSV missing required column: '{need}'")
-
-    # Coerce numeric-ish fields if present
-    for c in [
-        "last_week_count",
-        "last_month_count",
-        "next_week_forecast",
-        "next_month_forecast",
-        "total_to_date",
-        "total_tilldate",
-    ]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(int)
 
-    return df
+def partition_by_state(df: pd.DataFrame | None) -> Dict[str, pd.DataFrame]:
+    """Splits a loaded frame into {STATE: rows} with a single groupby pass."""
+    if df is None or df.empty or "state" not in df.columns:
+        return {}
+    return {str(k): g for k, g in df.groupby("state", observed=True, sort=False)}
+
+
+def load_counties_csv(path: str, chunksize: int | None = None, strict: bool = True):
+    """
+    Loads + validates the counties CSV (state is categorical, geoids checked against it);
+    with `chunksize`, returns a generator of validated chunks.
+    """
+    if not path:
+        raise ValueError("counties CSV path is required")
+    if chunksize:
+        chunks = _read_csv(path, chunksize)
+        return METRICS.timed("load_counties", (validate(c, "counties", path, strict) for c in chunks))
+    with METRICS.stage("load_counties") as st:
+        df = _read_csv(path)
+        st["rows"] += len(df)
+        return validate(df, "counties", path, strict)
 
 
-def load_state_csv(path: str | None) -> pd.DataFrame | None:
+def load_state_csv(path: str | None, strict: bool = True) -> pd.DataFrame | None:
     df = _read_csv(path)
     if df is None:
         return None
+    # blank counts stay <NA> so build_state_fields() can fall back to county rollups
+    with METRICS.stage("load_states", rows=len(df)):
+        return validate(df, "states", path, strict)
 
-    # Nice-to-have coercions
-    for c in ["total_to_date", "total_tilldate"]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(int)
-    return df
 
+def _prepare_spas(df: pd.DataFrame, path: str, strict: bool) -> pd.DataFrame:
+    df = validate(df, "spas", path, strict)
+
+    # Build safe spa_id from spa_name
+    df["spa_id"] = df["spa_name"].map(_slugify)
 
-def load_spa_csv(path: str | None) -> pd.DataFrame:
+    # Keep everything else as-is
+    for col in SPA_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+    return df[SPA_COLUMNS]
+
+
+def load_spa_csv(path: str | None, chunksize: int | None = None, strict: bool = True):
     """
     Expected columns (strings are fine):
       spa_name,color,total_till_date,
@@ -440,59 +1336,148 @@ def load_spa_csv(path: str | None) -> pd.DataFrame:
       next_week_start,next_week_end,next_week_forecast,
       next_month_start,next_month_end,next_month_forecast
     We DO NOT require 'state' or 'county_name' in the CSV; we force CA/Losangles.
+    With `chunksize`, returns a generator of prepared chunks (only SPA columns are parsed).
     """
+    if chunksize:
+        if not path:
+            return iter(())
+        chunks = _read_csv(path, chunksize, usecols=lambda c: c in SPA_COLUMNS or SCHEMAS["spas"].accepts(c))
+        return METRICS.timed("load_spas", (_prepare_spas(c, path, strict) for c in chunks))
+
     df = _read_csv(path)
     if df is None:
         return pd.DataFrame(columns=["spa_id", "spa_name", "state", "county_name"])
+    with METRICS.stage("load_spas", rows=len(df)):
+        return _prepare_spas(df, path, strict)
 
-    # Ensure spa_name is present (allow some aliases)
-    if "spa_name" not in df.columns:
-        for alt in ("spa", "name", "spaid", "spa_id"):
-            if alt in df.columns:
-                df = df.rename(columns={alt: "spa_name"})
-                break
-    if "spa_name" not in df.columns:
-        raise ValueError("SPA CSV missing required column: 'spa_name'")
 
-    # Build safe spa_id from spa_name
-    df["spa_id"] = df["spa_name"].map(_slugify)
+# ----------------------------- Parquet cache -----------------------------
+# Bump when the loaders change what they return, so stale caches get rebuilt.
+CACHE_VERSION = 4
 
-    # Coerce numeric-ish fields if present
-    for c in [
-        "total_till_date",
-        "last_obs_week_count",
-        "last_obs_month_count",
-        "next_week_forecast",
-        "next_month_forecast",
-    ]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(int)
-
-    # Keep everything else as-is (dates stay strings)
-    wanted_order = [
-        "spa_id",
-        "spa_name",
-        "state",          # will be forced to "CA" in upsert
-        "county_name",    # will be forced to "Losangles" in upsert
-        "color",
-        "total_till_date",
-        "last_obs_week_start",
-        "last_obs_week_end",
-        "last_obs_week_count",
-        "last_obs_month_start",
-        "last_obs_month_end",
-        "last_obs_month_count",
-        "next_week_start",
-        "next_week_end",
-        "next_week_forecast",
-        "next_month_start",
-        "next_month_end",
-        "next_month_forecast",
-    ]
-    for col in wanted_order:
-        if col not in df.columns:
-            df[col] = ""
-    return df[wanted_order]
+
+def _cache_paths(csv_path: str):
+    cache_dir = os.path.join(os.path.dirname(csv_path) or ".", ".cache")
+    base = os.path.join(cache_dir, os.path.basename(csv_path))
+    return base + ".parquet", base + ".json"
+
+
+def cached_load(path: str | None, loader, rebuild: bool = False, enabled: bool = True, **kwargs):
+    """
+    Runs `loader(path, **kwargs)` but keeps its typed output as Parquet in .cache/ next to
+    the CSV, keyed by the CSV's mtime and size (and the loader options). Later runs read the
+    Parquet and skip parsing, validation and coercion entirely. Falls back to plain loading
+    if no Parquet engine is installed.
+    """
+    if not enabled or not path or not os.path.exists(path):
+        return loader(path, **kwargs)
+    pq_path, meta_path = _cache_paths(path)
+    st = os.stat(path)
+    key = {"version": CACHE_VERSION, "loader": loader.__name__, "options": kwargs,
+           "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    if not rebuild:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                if json.load(f) == key:
+                    with METRICS.stage("cache_read") as st:
+                        df = pd.read_parquet(pq_path)
+                        st["rows"] += len(df)
+                    return df
+        except (OSError, ValueError, ImportError):
+            pass
+
+    df = loader(path, **kwargs)
+    if df is not None:
+        try:
+            os.makedirs(os.path.dirname(pq_path), exist_ok=True)
+            df.to_parquet(pq_path, index=False)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(key, f)
+        except ImportError:
+            print(f"  (no Parquet engine installed; not caching {path})")
+    return df
+
+
+# ----------------------------- Static snapshot export -----------------------------
+class SnapshotExporter:
+    """
+    Collects the docs we seed and writes them as content-hashed static JSON for the map:
+      national.<hash>.json          every state doc (with the county-rollup fallbacks applied)
+      counties/<STATE>.<hash>.json  {geoid: county doc}
+      spas/<STATE>.<hash>.json      {spa_id: SPA doc}
+      manifest.json                 logical name -> hashed file (the only uncacheable fetch)
+    Each file also gets a precompressed .gz sibling for static hosts that serve them.
+    Only hashed files an earlier manifest listed are ever pruned; anything else in the
+    directory is left alone.
+    """
+
+    HASHED = re.compile(r"(national|(counties|spas)/[A-Z]{2})\.[0-9a-f]{12}\.json")
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.counties: Dict[str, Dict[str, Any]] = {}
+        self.spas: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, kind: str, state: str, payloads):
+        target = getattr(self, kind)
+        if kind == "states":
+            target.update(payloads)
+        else:
+            target.setdefault(state, {}).update(payloads)
+
+    def _write_hashed(self, rel_base: str, obj) -> str:
+        data = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        rel = f"{rel_base}.{hashlib.sha256(data).hexdigest()[:12]}.json"
+        path = os.path.join(self.out_dir, rel)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            with gzip.open(path + ".gz", "wb", compresslevel=9) as f:
+                f.write(data)
+        return rel
+
+    def write(self) -> str:
+        def strip(docs):
+            # updated_at changes every run; leaving it in would defeat the content hashes
+            return {k: {f: v for f, v in d.items() if f != "updated_at"} for k, d in sorted(docs.items())}
+
+        manifest = {
+            "generated_at": int(time.time()),
+            "national": self._write_hashed("national", {"states": strip(self.states)}),
+            "counties": {st: self._write_hashed(f"counties/{st}", strip(d)) for st, d in sorted(self.counties.items())},
+            "spas": {st: self._write_hashed(f"spas/{st}", strip(d)) for st, d in sorted(self.spas.items())},
+        }
+        manifest_path = os.path.join(self.out_dir, "manifest.json")
+
+        # keep the files of the previous manifest (clients may still hold it); the ones it kept
+        # from the manifest before it (its "retained" list) are the only files that go
+        new = set(self._listed(manifest))
+        old, retained = set(), set()
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                prev = json.load(f)
+            old, retained = set(self._listed(prev)), set(prev.get("retained", []))
+        for rel in retained - new - old:
+            if self.HASHED.fullmatch(rel):
+                for path in (rel, rel + ".gz"):
+                    if os.path.exists(os.path.join(self.out_dir, path)):
+                        os.remove(os.path.join(self.out_dir, path))
+        manifest["retained"] = sorted(old - new)
+
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, manifest_path)
+        return manifest_path
+
+    @staticmethod
+    def _listed(manifest: Dict[str, Any]) -> list:
+        """The hashed files a manifest points at."""
+        files = [manifest.get("national"), *manifest.get("counties", {}).values(), *manifest.get("spas", {}).values()]
+        return [rel for rel in files if rel]
 
 
 # ----------------------------- Main seeding flow -----------------------------
@@ -510,96 +1495,313 @@ def main():
                     help="Path to states TLDR CSV")
     ap.add_argument("--spa-csv", default="data/spa_tldr.csv",
                     help="Path to SPA TLDR CSV (no state/county required)")
+    ap.add_argument("--max-inflight", type=int, default=8,
+                    help="Max Firestore batch commits in flight at once (1 = sequential)")
+    ap.add_argument("--delta", action="store_true",
+                    help="Only write docs whose content changed since the last push, and delete removed ones")
+    ap.add_argument("--snapshot", default="data/.last_push.json",
+                    help="Content-hash snapshot of the last push (read by --delta, refreshed after every push)")
+    ap.add_argument("--chunksize", type=int, default=None,
+                    help="Stream the counties/SPA CSVs in chunks of this many rows (flat memory for big exports)")
+    ap.add_argument("--rebuild-cache", action="store_true",
+                    help="Re-parse the CSVs and refresh their Parquet cache in data/.cache/")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Don't read or write the Parquet cache")
+    ap.add_argument("--export-dir", default=None,
+                    help="Also write content-hashed static JSON snapshots + manifest.json here (works with --dry-run)")
+    ap.add_argument("--weekly-csv", default="assets/weekly_matrix_by_county.csv",
+                    help="Weekly county matrix used for the YoY tiers (skipped if the file is missing)")
+    ap.add_argument("--forecast-model", choices=sorted(MODELS), default=None,
+                    help="Recompute next_week/next_month for counties and states from the weekly matrix "
+                         "with this model instead of taking the CSVs' values")
+    ap.add_argument("--forecast-workers", type=int, default=1,
+                    help="With --forecast-model, processes to shard the states across")
+    ap.add_argument("--hoist-periods", action="store_true",
+                    help="Store the period dates shared by a state's counties (and the SPAs) once, on the "
+                         "state doc as county_periods / spa_periods, instead of on every doc")
+    ap.add_argument("--history-dir", default=None,
+                    help="Append this run's forecasts to a partitioned Parquet history here (e.g. data/history)")
+    ap.add_argument("--run-date", default=None,
+                    help="Date the history records this run under (default: today; re-using a date replaces that run)")
+    ap.add_argument("--history-firestore", action="store_true",
+                    help="With --history-dir, also write per-entity history/{run_date} docs holding only changed fields")
+    ap.add_argument("--allow-bad-rows", action="store_true",
+                    help="Report rows that fail schema validation and seed the rest without them "
+                         "(default: abort before writing)")
+    ap.add_argument("--backend", choices=("firestore", "memory", "sqlite", "static"), default="firestore",
+                    help="Where writes go: Firestore, an in-process dict, a SQLite file (see --local-db), "
+                         "or a versioned tree of static files (see --static-dir)")
+    ap.add_argument("--local-db", default=None,
+                    help="memory: dump the docs to this JSON file at the end; "
+                         "sqlite: database file (default data/.local_seed.sqlite)")
+    ap.add_argument("--static-dir", default="data/static",
+                    help="static: root of the versioned file tree (latest.json + v/<version>/...)")
+    ap.add_argument("--static-keep", type=int, default=3,
+                    help="static: how many versions to keep, the live one included")
+    ap.add_argument("--replay", default=None,
+                    help="Push the docs of an earlier --backend sqlite/memory run (.sqlite or .json) to Firestore, then exit")
+    ap.add_argument("--journal", default="data/.seed_journal.json",
+                    help="Run journal: input hashes + last committed batch per state and entity (firestore/sqlite)")
+    ap.add_argument("--resume", action="store_true",
+                    help="Skip the batches an interrupted run with the same inputs already committed")
+    ap.add_argument("--metrics-json", default=None,
+                    help="Write per-stage timings, commit stats and the slowest batches here as JSON")
+    ap.add_argument("--metrics-prom", default=None,
+                    help="Write the same metrics in Prometheus textfile-collector format")
+    ap.add_argument("--profile", default=None,
+                    help="Run under cProfile, dump the stats here and print the top functions")
     args = ap.parse_args()
 
-    # --- SA, DB
-    debug_sa(args.service_account)
-    db = init_db(args.service_account)
-
-    # --- Load CSVs
-    counties_df = load_counties_csv(args.counties_csv)
-    states_df   = load_state_csv(args.states_csv)
-    spa_df      = load_spa_csv(args.spa_csv)
-
-    # --- Filter counties/states by --only-state if set
-    if args.only_state:
-        only = args.only_state.upper()
-        counties_df = counties_df.loc[counties_df["state"].str.upper() == only].copy()
-
-    # Computed totals fallback per state (from county totals)
-    computed_totals = {}
-    if "total_to_date" in counties_df.columns:
-        computed_totals = (
-            counties_df.groupby(counties_df["state"].str.upper())["total_to_date"]
-            .sum(min_count=1).fillna(0).astype(int).to_dict()
-        )
-
-    # Union of states from both CSVs so states with no counties still get written
-    states_from_counties = set(counties_df["state"].str.upper().unique())
-    states_from_states   = set(states_df["state"].str.upper().unique()) if states_df is not None and "state" in states_df.columns else set()
-    all_states = states_from_counties | states_from_states
-    if args.only_state:
-        all_states = {args.only_state.upper()}
-
-    # --- Seed states + counties
-    for state in sorted(all_states):
-        sub = counties_df.loc[counties_df["state"].str.upper() == state].copy()
-        print(f"\n=== Seeding {state} — {len(sub)} counties ===")
-
-        # pick state row if present
-        meta_row = None
-        if states_df is not None and "state" in states_df.columns:
-            m = states_df.loc[states_df["state"].str.upper() == state]
-            if not m.empty:
-                meta_row = m.iloc[0].to_dict()
-
-        # Build TLDR fields to set on the STATE document
-        def g(name, default=""):
-            return meta_row.get(name, default) if meta_row else default
-
-        # Optional total fields
-        total_till_date = g("total_till_date", None)
-        total_to_date   = g("total_to_date", None)
-        if (total_till_date is None or total_till_date == "") and state in computed_totals:
-            total_till_date = int(computed_totals[state])
-
-        state_fields = {
-            "state": state,
-            "state_name": g("state_name", ""),
-            "last_obs_week_start": g("last_obs_week_start", g("last_week_start", "")),
-            "last_obs_week_end":   g("last_obs_week_end",   g("last_week_end", "")),
-            "last_obs_week_count": int(g("last_obs_week_count", "0") or 0),
-            "last_obs_month_start": g("last_obs_month_start", g("last_month_start", "")),
-            "last_obs_month_end":   g("last_obs_month_end",   g("last_month_end", "")),
-            "last_obs_month_count": int(g("last_obs_month_count", "0") or 0),
-            "next_week_start": g("next_week_start", ""),
-            "next_week_end":   g("next_week_end", ""),
-            "next_week_forecast": int(g("next_week_forecast", "0") or 0),
-            "next_month_start": g("next_month_start", ""),
-            "next_month_end":   g("next_month_end", ""),
-            "next_month_forecast": int(g("next_month_forecast", "0") or 0),
-            "total_till_date": total_till_date if total_till_date not in ("", None) else 0,
-            "total_to_date": int(total_to_date) if str(total_to_date).strip().isdigit() else 0,
-            "color": g("color", ""),
-            "updated_at": int(time.time()),
-            "source": "seed_script_v2",
-        }
-
+    METRICS.count_bytes = bool(args.metrics_json or args.metrics_prom)
+    try:
+        try:
+            if args.profile:
+                prof = cProfile.Profile()
+                try:
+                    prof.runcall(seed, args)
+                finally:
+                    prof.dump_stats(args.profile)
+                    print(f"\nProfile written to {args.profile}; top functions by cumulative time:")
+                    pstats.Stats(prof).sort_stats("cumulative").print_stats(20)
+            else:
+                seed(args)
+        except SchemaError as e:
+            # every input is validated before the first write, so nothing has been written
+            raise SystemExit(f"{e}\nNothing written; fix the rows above or pass --allow-bad-rows to seed without them.")
+    finally:
+        METRICS.report()
+        if args.metrics_json:
+            METRICS.write_json(args.metrics_json)
+            print(f"Metrics written to {args.metrics_json}")
+        if args.metrics_prom:
+            METRICS.write_prom(args.metrics_prom)
+            print(f"Metrics written to {args.metrics_prom}")
+
+
+def seed(args):
+    # --- SA, DB (dry runs never write, so they skip the Firebase SDK and credentials entirely)
+    db = None if args.dry_run else open_db(args)
+    local = isinstance(db, LocalDB)
+    # the push snapshot tracks what Firestore holds, so local runs neither read nor refresh it
+    snapshot = PushSnapshot(None if local else args.snapshot, delta=args.delta and not local)
+
+    # --- Run journal: only for backends that keep every commit, so an ack means the docs survive
+    journal = None
+    if args.resume and (args.dry_run or args.backend in ("memory", "static")):
+        raise SystemExit("--resume needs a backend that keeps each commit (firestore or sqlite)")
+    if args.only_state and args.export_dir:
+        # the snapshot is a complete set: a one-state export would replace every other state
+        raise SystemExit("--export-dir writes the whole snapshot; drop --only-state")
+    if args.only_state and args.backend == "static" and not args.dry_run:
+        # each version is built from empty, so a one-state version would go live as the whole tree
+        raise SystemExit("--backend static publishes the whole tree; drop --only-state")
+    if db is not None and args.backend in ("firestore", "sqlite") and args.journal:
+        with METRICS.stage("journal"):
+            journal = RunJournal(args.journal, run_inputs(args), resume=args.resume)
+        # a resumed run records its history under the interrupted run's date
+        args.run_date = args.run_date or journal.run_date or time.strftime("%Y-%m-%d")
+        journal.run_date = args.run_date
+        journal.save()
+
+    if args.replay:
+        if args.backend != "firestore":
+            raise SystemExit("--replay pushes to Firestore; drop --backend")
+        if not os.path.exists(args.replay):
+            raise SystemExit(f"--replay: no local store at {args.replay}")
+        src = LocalDB(args.replay, read_only=True)
+        print(f"\n=== Replaying {len(src.docs)} docs from {args.replay} ===")
         if args.dry_run:
-            print("  (dry-run) state fields:", state_fields)
-            if len(sub):
-                print("  (dry-run) first county row:", sub.iloc[0].to_dict())
+            # count what would go out; the push snapshot is consulted but not saved
+            kinds = Counter("history" if hist else ("states" if path.count("/") == 1 else path.split("/")[2])
+                            for path, _, hist in replay_writes(src, snapshot))
+            src.close()
+            print(f"  (dry-run) would push {sum(kinds.values())} docs: "
+                  + (", ".join(f"{k} {n}" for k, n in sorted(kinds.items())) or "none"))
+            print(f"Delta vs last push — {snapshot.summary()}")
+            return
+        with BatchCommitter(max_inflight=args.max_inflight, journal=journal) as committer:
+            replay(src, db, committer, snapshot)
+        src.close()
+        snapshot.save()
+        if journal is not None:
+            journal.finish()
+        print(f"\nCommitted {committer.docs} docs in {committer.batches} batches"
+              f" ({committer.retries} retries).")
+        print(f"Delta vs last push — {snapshot.summary()}")
+        return
+
+    # --- Load CSVs (with --chunksize, counties/SPAs are generators of chunks)
+    strict = not args.allow_bad_rows
+    cache = {"rebuild": args.rebuild_cache, "enabled": not args.no_cache, "strict": strict}
+    states_df = cached_load(args.states_csv, load_state_csv, **cache)
+    if args.chunksize:
+        county_chunks = load_counties_csv(args.counties_csv, chunksize=args.chunksize, strict=strict)
+        spa_chunks    = load_spa_csv(args.spa_csv, chunksize=args.chunksize, strict=strict)
+    else:
+        county_chunks = [cached_load(args.counties_csv, load_counties_csv, **cache)]
+        spa_chunks    = [cached_load(args.spa_csv, load_spa_csv, **cache)]
+    # {"counties": {STATE: shared dates}, "spas": {"CA": ...}}, filled in before or as docs are written
+    periods = {"counties": {}, "spas": {}} if args.hoist_periods else None
+    if args.chunksize and (strict or periods is not None):
+        # streamed SPA chunks are otherwise only seen as they're written: validate them all before
+        # any write, and with --hoist-periods count the dates they share across every chunk
+        spa_counts = {}
+        for c in load_spa_csv(args.spa_csv, chunksize=args.chunksize, strict=strict):
+            if periods is not None:
+                period_counts(c, spa_counts, "CA")
+        if periods is not None:
+            periods["spas"].update(shared_periods(spa_counts))
+    only = args.only_state.upper() if args.only_state else None
+    with METRICS.stage("load_weekly"):
+        weekly = load_weekly_matrix(args.weekly_csv) if args.weekly_csv and os.path.exists(args.weekly_csv) else None
+
+    # --- Forecasts: the matrix's next week / next month replace the CSVs' precomputed ones
+    if args.forecast_model:
+        if weekly is None:
+            raise SystemExit(f"--forecast-model needs the weekly matrix; {args.weekly_csv} not found")
+        with METRICS.stage("forecast", rows=len(weekly[1])):
+            fc = forecast_counties(weekly, args.forecast_model, args.forecast_workers)
+        print(f"Forecast {len(fc)} counties with '{args.forecast_model}' for the week of "
+              f"{fc['next_week_start'].iloc[0]:%Y-%m-%d} and {fc['next_month_start'].iloc[0]:%B %Y}")
+        states_df = apply_state_forecasts(states_df, fc)
+        if args.chunksize:
+            county_chunks = (apply_county_forecasts(c, fc) for c in county_chunks)
+        else:
+            county_chunks = [apply_county_forecasts(county_chunks[0], fc)]
+
+    # --- Rankings: rank/YoY tiers are computed once here and stored on every doc
+    with METRICS.stage("rankings"):
+        if args.chunksize:
+            # one extra streaming pass; ranks within a state need every county's total, so this
+            # keeps a few narrow columns per county (not the rows) until the ranks are known
+            _, county_lift = yoy_lifts(weekly)
+            rank_parts, date_counts = [], {}
+            for c in load_counties_csv(args.counties_csv, chunksize=args.chunksize, strict=strict):
+                # ranked (and counted) as they'll be written, forecasts included
+                if args.forecast_model:
+                    c = apply_county_forecasts(c, fc, verbose=False)
+                rank_parts.append(county_rank_inputs(c, county_lift))
+                if periods is not None:
+                    # the same pass counts each state's dates, so the dates it shares are known
+                    # before its first chunk goes out
+                    with METRICS.stage("periods", rows=len(c)):
+                        period_counts(c, date_counts)
+            rank_src = pd.concat(rank_parts, ignore_index=True)
+            county_ranks = rank_counties(rank_src) if not rank_src.empty else None
+            if periods is not None:
+                periods["counties"].update(shared_periods(date_counts))
         else:
-            upsert_state_doc(db, state, state_fields)
-            upsert_counties(db, state, sub)
+            rank_src = county_chunks[0]
+            county_ranks = county_rankings(rank_src, weekly) if rank_src is not None and not rank_src.empty else None
+
+    committer = None if args.dry_run else BatchCommitter(max_inflight=args.max_inflight, journal=journal)
+    exporter = SnapshotExporter(args.export_dir) if args.export_dir else None
+    history = None
+    if args.history_dir and not args.dry_run:
+        history = HistoryRecorder(args.history_dir, args.run_date or time.strftime("%Y-%m-%d"))
+
+    # --- Seed counties, one partition per state per chunk; state rollups accumulate as we go
+    states_from_counties = set()  # every state, --only-state or not (national ranks need them all)
+    rollups = None
+    for chunk_no, chunk in enumerate(county_chunks, 1):
+        rollups = merge_rollups(rollups, rollup_counties(chunk))
+        for state, sub in sorted(partition_by_state(chunk).items()):
+            states_from_counties.add(state)
+            if only and state != only:
+                continue
+            sub = attach_rankings(sub, county_ranks)
+            print(f"\n=== Seeding {state} — {len(sub)} counties ===")
+            if exporter is not None:
+                exporter.add("counties", state, to_payloads(sub, "counties", state))
+            if history is not None:
+                history.add("counties", sub, state)
+            if args.dry_run:
+                print("  (dry-run) first county row:", sub.iloc[0].to_dict())
+            else:
+                upsert_counties(db, state, sub, committer=committer, snapshot=snapshot,
+                                periods=periods and periods["counties"],
+                                chunk_no=chunk_no if args.chunksize else None)
+
+    # --- State docs: union of states from both CSVs so states with no counties still get written
+    states_from_states = set(states_df["state"].unique()) if states_df is not None and "state" in states_df.columns else set()
+    ranked_states = states_from_counties | states_from_states | ({only} if only else set())
+    all_states = {only} if only else ranked_states
+    with METRICS.stage("state_fields", rows=len(ranked_states)):
+        # ranks are national, so every state is built and ranked; --only-state writes just its own
+        fields = build_state_fields(states_df, ranked_states, rollups)
+        for state, ranks in state_rankings(fields, weekly).items():
+            fields[state].update(ranks)
+        state_fields_by_state = {state: fields[state] for state in sorted(all_states)}
+    if exporter is not None:
+        exporter.add("states", None, state_fields_by_state)
+    if history is not None:
+        history.add_states(state_fields_by_state)
 
     # --- Seed SPAs (always to CA/Losangles as requested)
-    if spa_df is not None and not spa_df.empty:
+    for chunk_no, spa_df in enumerate(spa_chunks, 1):
+        if spa_df is None or spa_df.empty:
+            continue
         print(f"\n=== Seeding SPAs for CA — {len(spa_df)} rows ===")
+        if exporter is not None:
+            exporter.add("spas", "CA", to_payloads(spa_df, "spas", "CA"))
+        if history is not None:
+            history.add("spas", spa_df, "CA")
         if args.dry_run:
             print("  (dry-run) first SPA row:", spa_df.iloc[0].to_dict())
         else:
-            upsert_spas(db, "CA", spa_df)
+            upsert_spas(db, "CA", spa_df, committer=committer, snapshot=snapshot,
+                        periods=periods and periods["spas"],
+                        chunk_no=chunk_no if args.chunksize else None)
+
+    # --- State docs go last, so they can carry the period dates hoisted off the counties/SPAs
+    print(f"\n=== Seeding {len(all_states)} state docs ===")
+    for state in sorted(all_states):
+        state_fields = state_fields_by_state[state]
+        if periods is not None and not args.dry_run:
+            # written in full every time, so a field that stops being shared can't linger
+            blank = dict.fromkeys(DATE_FIELDS, "")
+            state_fields = {**state_fields, "county_periods": periods["counties"].get(state, blank)}
+            if state == "CA":
+                state_fields["spa_periods"] = periods["spas"].get("CA", blank)
+        if args.dry_run:
+            print(f"  (dry-run) {state} state fields:", state_fields)
+        else:
+            upsert_state_doc(db, state, state_fields, committer, snapshot)
+    if periods is not None and periods["spas"] and "CA" not in all_states and not args.dry_run:
+        # --only-state elsewhere still seeds the CA SPAs; their shared dates go on CA regardless
+        upsert_state_doc(db, "CA", {"spa_periods": periods["spas"]["CA"]}, committer)
+
+    if history is not None:
+        with METRICS.stage("history"):
+            try:
+                if args.history_firestore:
+                    write_history_deltas(db, history.deltas(), committer)
+                run = history.write()
+                print(f"\nHistory: {run['rows']} rows recorded for run {history.run_date} in {args.history_dir}")
+            except ImportError:
+                print(f"\n(no Parquet engine installed; forecast history not recorded)")
+
+    if committer is not None:
+        if args.delta:
+            delete_stale(db, snapshot, committer, scope=only)
+        committer.close()
+        snapshot.save()
+        if journal is not None:
+            journal.finish()
+        print(f"\nCommitted {committer.docs} docs in {committer.batches} batches"
+              f" ({committer.retries} retries).")
+        if committer.skipped:
+            print(f"Skipped {committer.skipped} batches the interrupted run had already committed.")
+        print(f"Delta vs last push — {snapshot.summary()}")
+    if local:
+        db.close()
+        print(f"Local {args.backend} store: {len(db.docs)} docs" + (f" in {db.path}" if db.path else ""))
+        if isinstance(db, StaticTreeDB):
+            print(f"Static tree now points at: {db.latest}")
+
+    if exporter is not None:
+        with METRICS.stage("export"):
+            print(f"\nWrote static snapshot: {exporter.write()}")
 
     print("\nDone.")
 
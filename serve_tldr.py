@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# serve_tldr.py
+# Local read API over the TLDR data: builds the same docs seed_firestore.py writes, keeps them
+# in memory indexed by state, geoid, SPA slug and normalized county name, and serves them as
+# JSON from a single-threaded asyncio HTTP server (stdlib only).
+#
+#   GET /states                               {"states": {STATE: state doc}}
+#   GET /states/<ST>                          state doc
+#   GET /states/<ST>/counties                 {geoid: county doc}
+#   GET /states/<ST>/counties/<GEOID>         county doc
+#   GET /states/<ST>/counties/by-name/<name>  county doc, name matched like normCounty() in app.js
+#   GET /states/<ST>/spas                     {spa_id: SPA doc}
+#   GET /counties/<GEOID>, /spas/<name or id> same docs without the state in the path
+#   GET /series/<ST>[/<county name>]          weekly series from the weekly matrix
+#   GET /manifest.json                        snapshot manifest, so the map can use the server
+#                                             through CFG.SNAPSHOT_MANIFEST unchanged
+#   GET /health                               counts, data version, load time
+#
+# Responses carry a content ETag (If-None-Match -> 304), are gzipped for clients that accept
+# it, and stay rendered in an LRU cache until the data changes. Input files are polled and
+# re-indexed in a worker thread when they change; a reload that fails keeps the old data.
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+
+import seed_firestore as sf
+from local_backend import LocalDB
+from weekly_matrix import county_keys, load_weekly_matrix, norm_county, split_header, state_sums
+
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed"}
+GZIP_MIN_BYTES = 512  # smaller bodies aren't worth the header + CPU
+# Stamped per run / per load, so they stay out of ETags (a reload of the same data still 304s).
+VOLATILE_FIELDS = ("updated_at", "loaded_at", "generated_at")
+
+
+# ----------------------------- Loading -----------------------------
+def build_docs(counties_csv: str, states_csv: str | None, spa_csv: str | None, weekly=None,
+               strict: bool = True) -> Dict[str, Dict[str, Any]]:
+    """{doc path: doc} exactly as a full seed_firestore.py run would write them."""
+    now = int(time.time())
+    states_df = sf.load_state_csv(states_csv, strict=strict)
+    counties = sf.load_counties_csv(counties_csv, strict=strict)
+    spas = sf.load_spa_csv(spa_csv, strict=strict)
+    docs = {}
+
+    ranks = sf.county_rankings(counties, weekly) if not counties.empty else None
+    partitions = sf.partition_by_state(counties)
+    for state, sub in partitions.items():
+        for geoid, rec in sf.to_payloads(sf.attach_rankings(sub, ranks), "counties", state):
+            rec.setdefault("updated_at", now)
+            docs[f"states/{state}/counties/{geoid}"] = rec
+
+    all_states = set(partitions)
+    if states_df is not None and "state" in states_df.columns:
+        all_states |= set(states_df["state"].astype(str).unique())
+    fields = sf.build_state_fields(states_df, all_states, sf.rollup_counties(counties))
+    for state, state_ranks in sf.state_rankings(fields, weekly).items():
+        fields[state].update(state_ranks)
+    for state, f in fields.items():
+        docs[f"states/{state}"] = {"state": state, **f}
+
+    if spas is not None and not spas.empty:
+        for spa_id, rec in sf.to_payloads(spas, "spas", "CA"):
+            rec.setdefault("updated_at", now)
+            docs[f"states/CA/spas/{spa_id}"] = rec
+    return docs
+
+
+class TLDRIndex:
+    """The docs plus the lookup tables the routes need; immutable once built."""
+
+    def __init__(self, docs: Dict[str, Dict[str, Any]], weekly=None):
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.counties: Dict[str, Dict[str, Dict[str, Any]]] = {}  # STATE -> geoid -> doc
+        self.geoids: Dict[str, Tuple[str, Dict[str, Any]]] = {}   # geoid -> (STATE, doc)
+        self.county_names: Dict[str, Dict[str, str]] = {}         # STATE -> name key -> geoid
+        self.spas: Dict[str, Dict[str, Dict[str, Any]]] = {}      # STATE -> spa_id -> doc
+        self.spa_slugs: Dict[str, Tuple[str, str]] = {}           # slug -> (STATE, spa_id)
+        for path, doc in sorted(docs.items()):
+            parts = path.split("/")
+            if parts[0] != "states":
+                continue
+            if len(parts) == 2:
+                self.states[parts[1]] = doc
+            elif len(parts) == 4 and parts[2] == "counties":
+                state, geoid = parts[1], parts[3]
+                self.counties.setdefault(state, {})[geoid] = doc
+                self.geoids[geoid] = (state, doc)
+                names = self.county_names.setdefault(state, {})
+                for key in county_keys(str(doc.get("county_name", ""))):
+                    names.setdefault(key, geoid)
+            elif len(parts) == 4 and parts[2] == "spas":
+                state, spa_id = parts[1], parts[3]
+                self.spas.setdefault(state, {})[spa_id] = doc
+                for name in (spa_id, doc.get("spa_name")):
+                    if name:
+                        self.spa_slugs.setdefault(sf._slugify(str(name)), (state, spa_id))
+
+        # weekly matrix: per-state column lookups by normalized county name, state sums up front
+        self.weeks, self.series_cols, self.state_series = [], {}, {}
+        self.values = None
+        if weekly is not None:
+            self.weeks, headers, self.values = weekly
+            if np.all(np.mod(self.values, 1) == 0):  # counts: serve 3, not 3.0 (as build_artifacts does)
+                self.values = self.values.astype(np.int64)
+            for i, h in enumerate(headers):
+                code, county = split_header(h)
+                cols = self.series_cols.setdefault(code, {})
+                for key in county_keys(county):
+                    cols.setdefault(key, (i, county))
+            self.state_series = state_sums(headers, self.values)
+
+        # updated_at is stamped per load/run, so it stays out of the version
+        stable = {p: {k: v for k, v in d.items() if k != "updated_at"} for p, d in docs.items()}
+        self.version = hashlib.sha256(json.dumps(stable, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+        self.loaded_at = int(time.time())
+
+    def county_by_name(self, state: str, name: str):
+        geoid = self.county_names.get(state, {}).get(norm_county(name))
+        return self.counties[state][geoid] if geoid else None
+
+    def series(self, state: str, county: str | None = None):
+        if self.values is None:
+            return None
+        if county is None:
+            values = self.state_series.get(state)
+            return None if values is None else {"state": state, "weeks": self.weeks, "values": values.tolist()}
+        hit = self.series_cols.get(state, {}).get(norm_county(county))
+        if hit is None:
+            return None
+        col, name = hit
+        return {"state": state, "county": name, "weeks": self.weeks, "values": self.values[:, col].tolist()}
+
+    def manifest(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "generated_at": self.loaded_at,
+            "national": "states",
+            "counties": {s: f"states/{s}/counties" for s in sorted(self.counties)},
+            "spas": {s: f"states/{s}/spas" for s in sorted(self.spas)},
+        }
+
+    def route(self, parts):
+        """Path segments -> JSON-able body, or None for 404."""
+        n = len(parts)
+        if parts == ["manifest.json"]:
+            return self.manifest()
+        if parts == ["health"]:
+            return {"version": self.version, "loaded_at": self.loaded_at, "states": len(self.states),
+                    "counties": len(self.geoids), "spas": sum(map(len, self.spas.values())),
+                    "weeks": len(self.weeks)}
+        if parts[0] == "states":
+            if n == 1:
+                return {"states": self.states}
+            state = parts[1].upper()
+            if n == 2:
+                return self.states.get(state)
+            if parts[2] == "counties":
+                if n == 3:
+                    return self.counties.get(state)
+                if n == 4:
+                    return self.counties.get(state, {}).get(parts[3].zfill(5))
+                if n == 5 and parts[3] == "by-name":
+                    return self.county_by_name(state, parts[4])
+            if parts[2] == "spas":
+                if n == 3:
+                    return self.spas.get(state)
+                if n == 4:
+                    hit = self.spa_slugs.get(sf._slugify(parts[3]))
+                    return self.spas[hit[0]][hit[1]] if hit and hit[0] == state else None
+            return None
+        if parts[0] == "counties" and n == 2:
+            hit = self.geoids.get(parts[1].zfill(5))
+            return hit[1] if hit else None
+        if parts[0] == "spas" and n == 2:
+            hit = self.spa_slugs.get(sf._slugify(parts[1]))
+            return self.spas[hit[0]][hit[1]] if hit else None
+        if parts[0] == "series" and n in (2, 3):
+            return self.series(parts[1].upper(), parts[2] if n == 3 else None)
+        return None
+
+
+# ----------------------------- Responses -----------------------------
+def _encode(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _stable(obj):
+    """`obj` without VOLATILE_FIELDS at any depth: what the ETag is computed from."""
+    if isinstance(obj, dict):
+        return {k: _stable(v) for k, v in obj.items() if k not in VOLATILE_FIELDS}
+    if isinstance(obj, list):
+        return [_stable(v) for v in obj]
+    return obj
+
+
+class Rendered:
+    """One rendered 200 body; the gzip variant is made on first request for it."""
+
+    __slots__ = ("body", "etag", "_gz")
+
+    def __init__(self, obj):
+        self.body = _encode(obj)
+        self.etag = '"' + hashlib.sha256(_encode(_stable(obj))).hexdigest()[:20] + '"'
+        self._gz = None
+
+    def gz(self) -> bytes:
+        if self._gz is None:
+            self._gz = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gz
+
+
+class ResponseCache:
+    """LRU of rendered bodies keyed by path; cleared whenever the index is swapped."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: "OrderedDict[str, Rendered]" = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key: str):
+        hit = self.entries.get(key)
+        if hit is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return hit
+
+    def put(self, key: str, value: Rendered):
+        self.entries[key] = value
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def _response(status: int, headers: Dict[str, str], body: bytes = b"", head: bool = False) -> bytes:
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+    headers = {**headers, "Content-Length": str(len(body))}
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head else body)
+
+
+def _error(status: int, message: str, keep_alive: bool) -> bytes:
+    body = json.dumps({"error": message}).encode("utf-8")
+    return _response(status, {"Content-Type": "application/json",
+                              "Access-Control-Allow-Origin": "*",
+                              "Connection": "keep-alive" if keep_alive else "close"}, body)
+
+
+# ----------------------------- Server -----------------------------
+class TLDRServer:
+    def __init__(self, args):
+        self.args = args
+        self.cache = ResponseCache(args.cache_size)
+        self.index = None
+        self.stamps = None
+        self.access_log = args.access_log
+
+    def sources(self):
+        if self.args.db:
+            return [self.args.db]
+        return [p for p in (self.args.counties_csv, self.args.states_csv, self.args.spa_csv, self.args.weekly_csv)
+                if p and os.path.exists(p)]
+
+    def _stamps(self):
+        out = {}
+        for p in self.sources():
+            st = os.stat(p)
+            out[p] = (st.st_mtime_ns, st.st_size)
+        return out
+
+    def load(self) -> TLDRIndex:
+        a = self.args
+        weekly = load_weekly_matrix(a.weekly_csv) if a.weekly_csv and os.path.exists(a.weekly_csv) else None
+        if a.db:
+            src = LocalDB(a.db, read_only=True)
+            docs = src.docs
+            src.close()
+        else:
+            docs = build_docs(a.counties_csv, a.states_csv, a.spa_csv, weekly, strict=not a.allow_bad_rows)
+        return TLDRIndex(docs, weekly)
+
+    def swap(self, index: TLDRIndex, stamps):
+        self.index, self.stamps = index, stamps
+        self.cache.clear()
+        print(f"Serving data version {index.version}: {len(index.states)} states, "
+              f"{len(index.geoids)} counties, {sum(map(len, index.spas.values()))} SPAs")
+
+    async def watch(self):
+        """Polls the inputs' mtime/size and re-indexes off the event loop when they change."""
+        while True:
+            await asyncio.sleep(self.args.poll)
+            try:
+                stamps = self._stamps()
+            except OSError:
+                continue  # a file mid-replace; look again next tick
+            if stamps == self.stamps:
+                continue
+            t0 = time.perf_counter()
+            try:
+                index = await asyncio.to_thread(self.load)
+            except Exception as e:  # bad edit: keep serving the last good data
+                print(f"Reload failed, still serving {self.index.version}: {e}")
+                self.stamps = stamps
+                continue
+            print(f"Reloaded in {time.perf_counter() - t0:.2f}s")
+            self.swap(index, stamps)
+
+    def respond(self, method: str, target: str, headers: Dict[str, str], keep_alive: bool) -> bytes:
+        if method not in ("GET", "HEAD"):
+            return _error(405, "only GET and HEAD are supported", keep_alive)
+        path = urlsplit(target).path
+        key = path.rstrip("/") or "/"
+        rendered = self.cache.get(key)
+        if rendered is None:
+            parts = [unquote(p) for p in key.split("/") if p]
+            body = self.index.route(parts) if parts else None
+            if body is None:
+                return _error(404, f"no such resource: {path}", keep_alive)
+            rendered = Rendered(body)
+            self.cache.put(key, rendered)
+
+        out = {
+            "Content-Type": "application/json",
+            "ETag": rendered.etag,
+            "Cache-Control": "no-cache",  # always revalidate; unchanged data costs a 304
+            "Vary": "Accept-Encoding",
+            "Access-Control-Allow-Origin": "*",
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        if rendered.etag in headers.get("if-none-match", ""):
+            return _response(304, out)
+        body = rendered.body
+        if len(body) >= GZIP_MIN_BYTES and "gzip" in headers.get("accept-encoding", ""):
+            body = rendered.gz()
+            out["Content-Encoding"] = "gzip"
+        return _response(200, out, body, head=method == "HEAD")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One connection; HTTP/1.1 keep-alive and pipelined requests are answered in order."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    writer.write(_error(400, "malformed request line", False))
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                if headers.get("content-length", "0") != "0":
+                    await reader.readexactly(int(headers["content-length"]))
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+                writer.write(self.respond(method.upper(), target, headers, keep_alive))
+                if self.access_log:
+                    print(f"{method} {target}")
+                if not keep_alive:
+                    break
+                await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self):
+        self.swap(self.load(), self._stamps())
+        server = await asyncio.start_server(self.handle, self.args.host, self.args.port,
+                                            reuse_address=True, backlog=1024)
+        print(f"Listening on http://{self.args.host}:{self.args.port}/ "
+              f"(set SNAPSHOT_MANIFEST to .../manifest.json to point the map here)")
+        if self.args.poll > 0:
+            asyncio.get_running_loop().create_task(self.watch())
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve the TLDR data from in-memory indexes over HTTP.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--counties-csv", default="data/counties_tldr.csv", help="Path to counties TLDR CSV")
+    ap.add_argument("--states-csv", default="data/states_tldr.csv", help="Path to states TLDR CSV")
+    ap.add_argument("--spa-csv", default="data/spa_tldr.csv", help="Path to SPA TLDR CSV")
+    ap.add_argument("--weekly-csv", default="assets/weekly_matrix_by_county.csv",
+                    help="Weekly county matrix for /series and the YoY tiers (skipped if missing)")
+    ap.add_argument("--db", default=None,
+                    help="Serve the docs of a --backend sqlite/memory run (.sqlite or .json) instead of the CSVs")
+    ap.add_argument("--allow-bad-rows", action="store_true",
+                    help="Report rows that fail schema validation and serve the rest instead of refusing the file")
+    ap.add_argument("--cache-size", type=int, default=4096, help="Rendered responses kept in the LRU cache")
+    ap.add_argument("--poll", type=float, default=1.0,
+                    help="Seconds between input file checks for hot reload (0 = never reload)")
+    ap.add_argument("--access-log", action="store_true", help="Print every request")
+    args = ap.parse_args()
+
+    try:
+        asyncio.run(TLDRServer(args).run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# static_store.py
+# Write sink that lays the seeded state/county/SPA hierarchy out as a versioned tree of
+# precompressed static files, so any static host or CDN can serve the map's reads.
+#
+#   <root>/latest.json                          pointer to the current version (only uncacheable file)
+#   <root>/v/<version>/states.json              {"states": {STATE: state doc}}
+#   <root>/v/<version>/states/<STATE>.json      one state doc
+#   <root>/v/<version>/states/<STATE>/counties.json, spas.json     {doc id: doc}
+#   <root>/v/<version>/states/<STATE>/counties/<GEOID>.json        one county doc (same for spas/)
+#   <root>/v/<version>/etags.json               {file: ETag}, .gz variants included
+#
+# Every file has a byte-stable .gz sibling. The version is a hash of the content, so an
+# unchanged seed produces the same version and leaves latest.json untouched. latest.json
+# carries the same national/counties/spas keys as the --export-dir manifest, so the map
+# reads it through CFG.SNAPSHOT_MANIFEST unchanged.
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict
+
+from local_backend import LocalDB
+
+
+def _encode(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _etag(data: bytes) -> str:
+    return '"' + hashlib.sha256(data).hexdigest()[:20] + '"'
+
+
+def tree_files(docs: Dict[str, Dict[str, Any]]) -> Dict[str, bytes]:
+    """{relative file path: JSON bytes} for a {doc path: doc} store, before versioning."""
+    states, colls = {}, {}
+    files = {}
+    for path, doc in sorted(docs.items()):
+        # updated_at changes every run; leaving it in would change the version every run
+        doc = {k: v for k, v in doc.items() if k != "updated_at"}
+        parts = path.split("/")
+        if parts[0] != "states":
+            continue
+        if len(parts) == 2:
+            states[parts[1]] = doc
+        elif len(parts) == 4:
+            colls.setdefault(f"states/{parts[1]}/{parts[2]}", {})[parts[3]] = doc
+        else:
+            continue
+        files[f"{path}.json"] = _encode(doc)
+    files["states.json"] = _encode({"states": states})
+    for coll, members in colls.items():
+        files[f"{coll}.json"] = _encode(members)
+    return files
+
+
+def write_static_tree(docs: Dict[str, Dict[str, Any]], root: str, keep: int = 3) -> str:
+    """Writes one version of the tree under `root`, repoints latest.json and prunes old versions."""
+    files = tree_files(docs)
+    digest = hashlib.sha256()
+    for rel in sorted(files):
+        digest.update(rel.encode("utf-8") + b"\0" + hashlib.sha256(files[rel]).digest())
+    version = digest.hexdigest()[:12]
+
+    versions_dir = os.path.join(root, "v")
+    final = os.path.join(versions_dir, version)
+    if not os.path.isdir(final):
+        # build off to the side and rename, so a half-written version is never visible
+        tmp = os.path.join(versions_dir, f".tmp-{version}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        etags = {}
+        for rel, data in files.items():
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            path = os.path.join(tmp, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            with open(path + ".gz", "wb") as f:
+                f.write(gz)
+            etags[rel] = _etag(data)
+            etags[rel + ".gz"] = _etag(gz)
+        with open(os.path.join(tmp, "etags.json"), "wb") as f:
+            f.write(_encode(etags))
+        os.replace(tmp, final)
+
+    latest_path = os.path.join(root, "latest.json")
+    current = None
+    if os.path.exists(latest_path):
+        with open(latest_path, "r", encoding="utf-8") as f:
+            current = json.load(f).get("version")
+    if current != version:
+        os.utime(final)  # pruning goes by mtime, so a re-published old version counts as newest
+        base = f"v/{version}/"
+        latest = {
+            "version": version,
+            "generated_at": int(time.time()),
+            "base": base,
+            "etags": base + "etags.json",
+            "national": base + "states.json",
+            "counties": {rel.split("/")[1]: base + rel for rel in files if rel.endswith("/counties.json")},
+            "spas": {rel.split("/")[1]: base + rel for rel in files if rel.endswith("/spas.json")},
+        }
+        tmp = latest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(latest, f, indent=1, sort_keys=True)
+        os.replace(tmp, latest_path)
+
+    # newest first; the live version and the one before it are always kept
+    old = sorted((d for d in os.listdir(versions_dir) if not d.startswith(".") and d != version),
+                 key=lambda d: os.path.getmtime(os.path.join(versions_dir, d)), reverse=True)
+    for d in old[max(keep - 1, 1):]:
+        shutil.rmtree(os.path.join(versions_dir, d), ignore_errors=True)
+    return latest_path
+
+
+class StaticTreeDB(LocalDB):
+    """A LocalDB that collects the seed in memory and writes it as a static tree on close()."""
+
+    def __init__(self, root: str, keep: int = 3):
+        super().__init__(None)
+        self.path = root
+        self.keep = keep
+        self.latest = None
+
+    def close(self):
+        self.latest = write_static_tree(self.docs, self.path, self.keep)
@@ -0,0 +1,81 @@
+import csv
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_firestore as sf  # noqa: E402
+from local_backend import LocalDB  # noqa: E402
+
+MINORITY, MAJORITY = "2025-09-29", "2025-10-06"
+
+
+def _counties_csv(tmp_path):
+    """12 CA counties; the first two (one streamed chunk of 2) carry a minority last-week date."""
+    with open(os.path.join(ROOT, "data", "counties_tldr.csv"), newline="") as f:
+        header, *body = list(csv.reader(f))
+    rows = []
+    for i in range(12):
+        row = list(body[i % len(body)])
+        row[:3] = ["CA", f"06{2 * i + 1:03d}", f"County {i}"]
+        row[header.index("last_obs_week_start")] = MINORITY if i < 2 else MAJORITY
+        rows.append(row)
+    path = tmp_path / "counties.csv"
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows([header, *rows])
+    return str(path)
+
+
+def _seed(monkeypatch, out, counties, *extra):
+    monkeypatch.setattr(sys, "argv", [
+        "seed_firestore.py", "--backend", "memory", "--local-db", out,
+        "--counties-csv", counties,
+        "--states-csv", os.path.join(ROOT, "data", "states_tldr.csv"),
+        "--spa-csv", os.path.join(ROOT, "data", "spa_tldr.csv"),
+        "--no-cache", "--journal", "", *extra,
+    ])
+    sf.main()
+    return LocalDB(out, read_only=True).docs
+
+
+def _children(docs):
+    """County/SPA docs with the state doc's shared dates filled back in, minus updated_at."""
+    out = {}
+    for path, rec in docs.items():
+        parts = path.split("/")
+        if len(parts) != 4:
+            continue
+        field = "county_periods" if parts[2] == "counties" else "spa_periods"
+        shared = docs[f"states/{parts[1]}"].get(field, {})
+        out[path] = {k: v for k, v in {**{k: v for k, v in shared.items() if v}, **rec}.items() if k != "updated_at"}
+    return out
+
+
+@pytest.mark.parametrize("chunksize", [None, "2"])
+def test_hoisted_dates_come_from_the_whole_state(tmp_path, monkeypatch, chunksize):
+    counties = _counties_csv(tmp_path)
+    stream = ["--chunksize", chunksize] if chunksize else []
+    plain = _seed(monkeypatch, str(tmp_path / "plain.json"), counties, *stream)
+    hoisted = _seed(monkeypatch, str(tmp_path / "hoisted.json"), counties, "--hoist-periods", *stream)
+
+    shared = hoisted["states/CA"]["county_periods"]
+    assert shared["last_obs_week_start"] == MAJORITY
+    assert set(shared) == set(sf.DATE_FIELDS)
+    assert hoisted["states/CA/counties/06001"]["last_obs_week_start"] == MINORITY
+    assert "last_obs_week_start" not in hoisted["states/CA/counties/06005"]
+    assert "spa_periods" in hoisted["states/CA"]
+
+    # the docs the client rebuilds are the ones a plain run writes
+    assert _children(hoisted) == _children(plain)
+
+
+def test_hoist_keeps_dates_no_two_docs_share():
+    payloads = [("a", {"next_week_start": "2025-10-13", "last_obs_week_start": "2025-10-06"}),
+                ("b", {"next_week_start": "2025-10-13", "last_obs_week_start": "2025-09-29"})]
+    shared = sf.hoist_periods(payloads)
+    assert shared["next_week_start"] == "2025-10-13"
+    assert shared["last_obs_week_start"] == ""
+    assert payloads[0][1] == {"last_obs_week_start": "2025-10-06"}
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_firestore as sf  # noqa: E402
+
+INPUTS = {"files": {"counties": "abc"}, "snapshot": None, "options": {"chunksize": 2}}
+
+
+def _interrupted(path, inputs=INPUTS, complete=False):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"inputs": inputs, "run_date": "2025-10-13", "complete": complete,
+                   "acked": {"counties/CA": 2, "states/CA": 1}}, f)
+
+
+def test_resume_skips_acked_batches(tmp_path):
+    path = str(tmp_path / "journal.json")
+    _interrupted(path)
+    journal = sf.RunJournal(path, INPUTS, resume=True)
+    assert journal.run_date == "2025-10-13"
+    assert [journal.next("counties/CA") for _ in range(3)] == [(1, True), (2, True), (3, False)]
+    assert journal.next("counties/TX") == (1, False)
+
+
+def test_resume_refuses_a_journal_with_other_inputs(tmp_path, capsys):
+    path = str(tmp_path / "journal.json")
+    _interrupted(path, {**INPUTS, "options": {"chunksize": 3}})
+    journal = sf.RunJournal(path, INPUTS, resume=True)
+    assert journal.done == {} and journal.run_date is None
+    assert journal.next("counties/CA") == (1, False)
+    assert "inputs or options changed" in capsys.readouterr().out
+
+
+def test_resume_after_a_finished_run_seeds_everything(tmp_path):
+    path = str(tmp_path / "journal.json")
+    _interrupted(path, complete=True)
+    assert sf.RunJournal(path, INPUTS, resume=True).done == {}
+
+
+def test_without_resume_the_journal_starts_over(tmp_path):
+    path = str(tmp_path / "journal.json")
+    _interrupted(path)
+    journal = sf.RunJournal(path, INPUTS)
+    assert journal.next("counties/CA") == (1, False)
+    journal.ack("counties/CA", 1)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["acked"] == {"counties/CA": 1}
+
+
+def test_run_inputs_change_with_the_input_files(tmp_path):
+    csv = tmp_path / "counties.csv"
+    csv.write_text("state,geoid\nCA,06037\n")
+    args = argparse.Namespace(
+        states_csv=None, counties_csv=str(csv), spa_csv=None, weekly_csv=None, replay=None,
+        snapshot=None, delta=False, only_state=None, chunksize=None, allow_bad_rows=False,
+        forecast_model=None, hoist_periods=False, backend="sqlite", local_db=None,
+        history_dir=None, history_firestore=False, run_date=None)
+    before = sf.run_inputs(args)
+    csv.write_text("state,geoid\nCA,06001\n")
+    assert sf.run_inputs(args) != before
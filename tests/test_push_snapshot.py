@@ -0,0 +1,71 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_firestore as sf  # noqa: E402
+from local_backend import LocalDB  # noqa: E402
+
+
+def _push(path, docs, delta=True, scope=None):
+    """One push of {(kind, key): rec} through a snapshot; returns it and the keys it wrote."""
+    snapshot = sf.PushSnapshot(path, delta=delta)
+    written = [(kind, key) for (kind, key), rec in docs.items() if snapshot.changed(kind, key, rec)]
+    return snapshot, written
+
+
+def test_delta_skips_unchanged_docs(tmp_path):
+    path = str(tmp_path / "snap.json")
+    docs = {("states", "CA"): {"total_till_date": 1}, ("counties", "CA/06037"): {"total_till_date": 2}}
+    snapshot, written = _push(path, docs)
+    assert written == list(docs)
+    snapshot.save()
+
+    docs[("counties", "CA/06037")] = {"total_till_date": 3}
+    docs[("counties", "CA/06001")] = {"total_till_date": 4}
+    snapshot, written = _push(path, docs)
+    assert written == [("counties", "CA/06037"), ("counties", "CA/06001")]
+    assert snapshot.counts["counties"] == {"insert": 1, "update": 1, "unchanged": 0, "delete": 0}
+    assert snapshot.counts["states"]["unchanged"] == 1
+
+
+def test_without_delta_everything_is_written(tmp_path):
+    path = str(tmp_path / "snap.json")
+    docs = {("states", "CA"): {"total_till_date": 1}}
+    _push(path, docs)[0].save()
+    snapshot, written = _push(path, docs, delta=False)
+    assert written == list(docs)
+    assert snapshot.counts["states"]["unchanged"] == 1
+
+
+def test_unsaved_snapshot_is_not_persisted(tmp_path):
+    path = str(tmp_path / "snap.json")
+    _push(path, {("states", "CA"): {"total_till_date": 1}})
+    assert not os.path.exists(path)
+    assert sf.PushSnapshot(None).prev == {"states": {}, "counties": {}, "spas": {}}
+
+
+def test_stale_docs_are_listed_within_scope_and_deleted(tmp_path):
+    path = str(tmp_path / "snap.json")
+    _push(path, {
+        ("states", "CA"): {"n": 1}, ("states", "TX"): {"n": 1},
+        ("counties", "CA/06037"): {"n": 1}, ("counties", "CA/06001"): {"n": 1},
+        ("counties", "TX/48201"): {"n": 1},
+    })[0].save()
+
+    # an --only-state CA run that no longer has 06001
+    snapshot, _ = _push(path, {("states", "CA"): {"n": 1}, ("counties", "CA/06037"): {"n": 1}})
+    assert snapshot.stale("counties", "CA") == ["CA/06001"]
+    assert snapshot.stale("states", "CA") == []
+    assert snapshot.stale("counties") == ["CA/06001", "TX/48201"]
+
+    db = LocalDB()
+    for path_ in ("states/CA", "states/CA/counties/06037", "states/CA/counties/06001", "states/TX/counties/48201"):
+        sf.doc_ref(db, path_).set({"n": 1})
+    with sf.BatchCommitter(max_inflight=1, verbose=False) as committer:
+        sf.delete_stale(db, snapshot, committer, scope="CA")
+    assert sorted(db.docs) == ["states/CA", "states/CA/counties/06037", "states/TX/counties/48201"]
+    assert "CA/06001" not in snapshot.next["counties"]
+    assert "TX/48201" in snapshot.next["counties"]
+    assert snapshot.counts["counties"]["delete"] == 1
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed_firestore as sf  # noqa: E402
+from local_backend import LocalDB  # noqa: E402
+
+
+def test_replay_pushes_history_docs(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    run = str(tmp_path / "run.json")
+    monkeypatch.setattr(sys, "argv", [
+        "seed_firestore.py", "--backend", "memory", "--local-db", run,
+        "--counties-csv", os.path.join(ROOT, "data", "counties_tldr.csv"),
+        "--states-csv", os.path.join(ROOT, "data", "states_tldr.csv"),
+        "--spa-csv", os.path.join(ROOT, "data", "spa_tldr.csv"),
+        "--history-dir", str(tmp_path / "history"), "--history-firestore",
+        "--run-date", "2025-10-13", "--no-cache", "--journal", "",
+    ])
+    sf.main()
+
+    src = LocalDB(run, read_only=True)
+    history = [p for p in src.docs if p.split("/")[-2] == "history"]
+    assert any(p.count("/") == 3 for p in history)  # states/XX/history/<date>
+    assert any(p.count("/") == 5 for p in history)  # states/XX/counties/<geoid>/history/<date>
+
+    dest = LocalDB()
+    snapshot = sf.PushSnapshot(None)
+    with sf.BatchCommitter(max_inflight=2, verbose=False) as committer:
+        sf.replay(src, dest, committer, snapshot)
+
+    assert dest.docs == src.docs
+    # the snapshot holds the entity docs' hashes, untouched by their history docs
+    for kind, hashes in snapshot.next.items():
+        for key, h in hashes.items():
+            state, _, doc_id = key.partition("/")
+            path = f"states/{state}" + (f"/{kind}/{doc_id}" if doc_id else "")
+            assert h == sf._content_hash(src.docs[path])
+    assert "history" not in snapshot.next
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tldr_schema import SchemaError, validate  # noqa: E402
+
+
+def _counties(**overrides):
+    rows = {
+        "state": ["CA", "ca", "TX"],
+        "geoid": ["6037", "06001", "48201"],
+        "county_name": ["Los Angeles County", "Alameda County", "Harris County"],
+        "total_till_date": ["10", "20", "30"],
+        "last_obs_week_start": ["2025-10-06", "2025-10-06", ""],
+    }
+    rows.update(overrides)
+    return pd.DataFrame(rows)
+
+
+def test_aliases_take_the_canonical_name():
+    df = _counties().rename(columns={"total_till_date": "total_to_date", "last_obs_week_start": "last_week_start"})
+    out = validate(df, "counties")
+    assert list(out["total_till_date"]) == [10, 20, 30]
+    assert out["last_obs_week_start"].iloc[0] == pd.Timestamp("2025-10-06")
+    assert pd.isna(out["last_obs_week_start"].iloc[2])
+    assert list(out["geoid"]) == ["06037", "06001", "48201"]
+    assert list(out["state"].astype(str)) == ["CA", "CA", "TX"]
+
+
+def test_alias_ignored_when_canonical_column_present():
+    df = _counties(total_to_date=["1", "2", "3"])
+    out = validate(df, "counties")
+    assert list(out["total_till_date"]) == [10, 20, 30]
+    assert list(out["total_to_date"]) == ["1", "2", "3"]
+
+
+def test_spa_name_alias():
+    out = validate(pd.DataFrame({"name": ["Antelope Valley"], "total_till_date": ["5"]}), "spas")
+    assert list(out["spa_name"]) == ["Antelope Valley"]
+
+
+def test_missing_required_column():
+    with pytest.raises(ValueError, match="missing required column: 'geoid'"):
+        validate(_counties().drop(columns=["geoid"]), "counties")
+
+
+def test_strict_reports_every_bad_value_with_its_line():
+    df = _counties(total_till_date=["10", "lots", "30"], geoid=["6037", "06001", "06201"])
+    with pytest.raises(SchemaError) as exc:
+        validate(df, "counties", "counties.csv")
+    errors = exc.value.errors
+    assert list(zip(errors["line"], errors["column"])) == [(3, "total_till_date"), (4, "geoid")]
+    assert "counties.csv: 2 bad value(s)" in str(exc.value)
+    assert "FIPS prefix does not match" in str(exc.value)
+
+
+def test_duplicate_ids_are_bad_rows():
+    with pytest.raises(SchemaError, match="duplicate geoid"):
+        validate(_counties(geoid=["06037", "06037", "48201"]), "counties")
+
+
+def test_non_strict_drops_only_the_bad_rows(capsys):
+    df = _counties(state=["CA", "ZZ", "TX"], last_obs_week_start=["2025-10-06", "2025-10-06", "soon"])
+    out = validate(df, "counties", "counties.csv", strict=False)
+    assert list(out["geoid"]) == ["06037"]
+    assert "dropping 2 bad row(s)" in capsys.readouterr().out
+
+
+def test_states_keep_blank_totals_nullable():
+    out = validate(pd.DataFrame({"state": ["CA", "TX"], "total_till_date": ["", "7"]}), "states")
+    assert pd.isna(out["total_till_date"].iloc[0])
+    assert out["total_till_date"].iloc[1] == 7
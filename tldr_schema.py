@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# tldr_schema.py
+# One declarative schema per TLDR entity (states, counties, SPAs), compiled into a
+# vectorized validator + coercer that the seeder runs once on every loaded frame.
+
+import argparse
+import sys
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# State code -> 2-digit FIPS prefix of its county geoids (app.js table plus the territories).
+STATE_FIPS = {
+    "AL": "01", "AK": "02", "AZ": "04", "AR": "05", "CA": "06", "CO": "08", "CT": "09", "DE": "10",
+    "FL": "12", "GA": "13", "HI": "15", "ID": "16", "IL": "17", "IN": "18", "IA": "19", "KS": "20",
+    "KY": "21", "LA": "22", "ME": "23", "MD": "24", "MA": "25", "MI": "26", "MN": "27", "MS": "28",
+    "MO": "29", "MT": "30", "NE": "31", "NV": "32", "NH": "33", "NJ": "34", "NM": "35", "NY": "36",
+    "NC": "37", "ND": "38", "OH": "39", "OK": "40", "OR": "41", "PA": "42", "RI": "44", "SC": "45",
+    "SD": "46", "TN": "47", "TX": "48", "UT": "49", "VT": "50", "VA": "51", "WA": "53", "WV": "54",
+    "WI": "55", "WY": "56", "DC": "11", "PR": "72", "GU": "66", "VI": "78",
+}
+
+# Column types
+INT, DATE, TEXT, STATE, GEOID = "int", "date", "text", "state", "geoid"
+
+# Fields every entity shares: field -> (type, older column names accepted in its place)
+PERIOD_FIELDS = {
+    "color": (TEXT, ()),
+    "last_obs_week_start": (DATE, ("last_week_start",)),
+    "last_obs_week_end": (DATE, ("last_week_end",)),
+    "last_obs_week_count": (INT, ("last_week_count",)),
+    "last_obs_month_start": (DATE, ("last_month_start",)),
+    "last_obs_month_end": (DATE, ("last_month_end",)),
+    "last_obs_month_count": (INT, ("last_month_count",)),
+    "next_week_start": (DATE, ()),
+    "next_week_end": (DATE, ()),
+    "next_week_forecast": (INT, ()),
+    "next_month_start": (DATE, ()),
+    "next_month_end": (DATE, ()),
+    "next_month_forecast": (INT, ()),
+}
+
+# Per entity: CSV label, required columns, the column that must be unique, whether blank
+# ints stay <NA> (so state docs can fall back to county rollups), and the typed fields.
+# Columns not listed here pass through untouched.
+SCHEMAS = {
+    "states": {
+        "label": "states",
+        "required": ("state",),
+        "unique": "state",
+        "nullable": True,
+        "fields": {
+            "state": (STATE, ()),
+            "state_name": (TEXT, ()),
+            "total_till_date": (INT, ("total_tilldate",)),
+            "total_to_date": (INT, ()),
+            **PERIOD_FIELDS,
+        },
+    },
+    "counties": {
+        "label": "counties",
+        "required": ("state", "geoid"),
+        "unique": "geoid",
+        "nullable": False,
+        "fields": {
+            "state": (STATE, ()),
+            "geoid": (GEOID, ()),
+            "county_name": (TEXT, ()),
+            "total_till_date": (INT, ("total_to_date", "total_tilldate")),
+            **PERIOD_FIELDS,
+        },
+    },
+    "spas": {
+        "label": "SPA",
+        "required": ("spa_name",),
+        "unique": "spa_name",
+        "nullable": False,
+        "fields": {
+            "spa_name": (TEXT, ("spa", "name", "spaid", "spa_id")),
+            "total_till_date": (INT, ("total_to_date", "total_tilldate")),
+            **PERIOD_FIELDS,
+        },
+    },
+}
+
+# Every integer / date column name any schema accepts, aliases included.
+NUMERIC_FIELDS = tuple(dict.fromkeys(
+    name for spec in SCHEMAS.values() for field, (kind, aliases) in spec["fields"].items()
+    if kind == INT for name in (field, *aliases)
+))
+DATE_FIELDS = tuple(f for f, (kind, _) in PERIOD_FIELDS.items() if kind == DATE)
+
+MAX_REPORTED = 20
+
+
+class SchemaError(ValueError):
+    """Bad rows in a TLDR CSV; `errors` is a frame of line, column, value, error."""
+
+    def __init__(self, source: str, errors: pd.DataFrame):
+        self.errors = errors
+        lines = [f"{source}: {len(errors)} bad value(s)"]
+        for r in errors.head(MAX_REPORTED).itertuples(index=False):
+            lines.append(f"  line {r.line}: {r.column}={r.value!r}: {r.error}")
+        if len(errors) > MAX_REPORTED:
+            lines.append(f"  ... and {len(errors) - MAX_REPORTED} more")
+        super().__init__("\n".join(lines))
+
+
+def _text(s: pd.Series) -> pd.Series:
+    return s.fillna("").astype(str).str.strip()
+
+
+class Schema:
+    """A compiled SCHEMAS entry: alias map and per-type column lists are worked out once."""
+
+    def __init__(self, kind: str, spec: Dict):
+        self.kind = kind
+        self.label = spec["label"]
+        self.required = spec["required"]
+        self.unique = spec["unique"]
+        self.nullable = spec["nullable"]
+        self.fields = spec["fields"]
+        self.aliases = {alias: field for field, (_, aliases) in self.fields.items() for alias in aliases}
+        self.by_type = {}
+        for field, (kind_, _) in self.fields.items():
+            self.by_type.setdefault(kind_, []).append(field)
+
+    def accepts(self, column: str) -> bool:
+        """True for the schema's own columns and their aliases (used to prune streamed reads)."""
+        return column in self.fields or column in self.aliases
+
+    def _rename(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Older column names take the canonical name, unless the canonical column exists too."""
+        renames = {}
+        for col in df.columns:
+            field = self.aliases.get(col)
+            if field and field not in df.columns and field not in renames.values():
+                renames[col] = field
+        return df.rename(columns=renames) if renames else df
+
+    def apply(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]:
+        """
+        Renames aliases, coerces every typed column in one vectorized pass each and returns
+        (frame, errors, bad rows mask). Errors carry 1-based CSV line numbers (header = line 1),
+        taken from the frame's index, which pandas keeps running across streamed chunks.
+        """
+        df = self._rename(df)
+        for need in self.required:
+            if need not in df.columns:
+                raise ValueError(f"{self.label} CSV missing required column: '{need}'")
+
+        idx = df.index
+        lines = (np.asarray(idx) + 2) if pd.api.types.is_integer_dtype(idx) else np.arange(len(df)) + 2
+        bad = []  # (column, mask, raw values, message)
+
+        for c in self.by_type.get(TEXT, ()):
+            if c in df.columns:
+                df[c] = df[c].fillna("").astype(str)
+
+        for c in self.by_type.get(INT, ()):
+            if c not in df.columns or pd.api.types.is_integer_dtype(df[c]):
+                continue
+            raw = df[c]
+            if pd.api.types.is_numeric_dtype(raw):
+                num = raw.astype("float64")
+                wrong = pd.Series(False, index=idx)
+            else:
+                txt = _text(raw)
+                num = pd.to_numeric(txt.mask(txt.eq("")), errors="coerce").astype("float64")
+                wrong = num.isna() & txt.ne("")
+            wrong |= num.notna() & ~np.isfinite(num)
+            bad.append((c, wrong, raw, "not a number"))
+            num = num.mask(wrong).round()
+            df[c] = num.astype("Int64") if self.nullable else num.fillna(0).astype("int64")
+
+        for c in self.by_type.get(DATE, ()):
+            if c not in df.columns or pd.api.types.is_datetime64_any_dtype(df[c]):
+                continue
+            txt = _text(df[c])
+            parsed = pd.to_datetime(txt.mask(txt.eq("")), format="ISO8601", errors="coerce")
+            bad.append((c, parsed.isna() & txt.ne(""), txt, "not a YYYY-MM-DD date"))
+            df[c] = parsed
+
+        if STATE in self.by_type and "state" in df.columns:
+            code = _text(df["state"]).str.upper()
+            bad.append(("state", ~code.isin(STATE_FIPS), df["state"], "unknown state code"))
+            df["state"] = code.astype("category")
+
+        if GEOID in self.by_type and "geoid" in df.columns:
+            geoid = _text(df["geoid"]).str.zfill(5)
+            malformed = ~geoid.str.fullmatch(r"\d{5}")
+            prefix = df["state"].astype(str).map(STATE_FIPS) if "state" in df.columns else None
+            bad.append(("geoid", malformed, df["geoid"], "not a 5-digit county FIPS code"))
+            if prefix is not None:
+                wrong_state = ~malformed & prefix.notna() & geoid.str[:2].ne(prefix)
+                bad.append(("geoid", wrong_state, df["geoid"],
+                            "FIPS prefix does not match the row's state"))
+            df["geoid"] = geoid
+
+        if self.unique in df.columns:
+            key = df[self.unique].astype(str)
+            bad.append((self.unique, key.duplicated(), key, f"duplicate {self.unique}"))
+
+        errors = [
+            pd.DataFrame({"line": lines[mask.to_numpy()], "column": col,
+                          "value": values[mask].astype(str).to_numpy(), "error": msg})
+            for col, mask, values, msg in bad if mask.any()
+        ]
+        rows = np.zeros(len(df), dtype=bool)
+        for _, mask, _, _ in bad:
+            rows |= mask.to_numpy(dtype=bool)
+        if not errors:
+            return df, pd.DataFrame(columns=["line", "column", "value", "error"]), rows
+        return df, pd.concat(errors, ignore_index=True).sort_values("line", kind="stable", ignore_index=True), rows
+
+
+COMPILED = {kind: Schema(kind, spec) for kind, spec in SCHEMAS.items()}
+
+
+def validate(df: pd.DataFrame, kind: str, source: str = "", strict: bool = True) -> pd.DataFrame:
+    """
+    Applies the `kind` schema. Bad values raise SchemaError when `strict`; otherwise they
+    are reported and their rows dropped, so only the rest of the file gets seeded.
+    """
+    df, errors, bad = COMPILED[kind].apply(df)
+    if not errors.empty:
+        err = SchemaError(source or COMPILED[kind].label, errors)
+        if strict:
+            raise err
+        print(f"WARNING: {err}\n  dropping {int(bad.sum())} bad row(s)")
+        df = df[~bad]
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Validate a TLDR CSV against its schema.")
+    ap.add_argument("kind", choices=sorted(SCHEMAS), help="Which entity the CSV holds")
+    ap.add_argument("csv", help="Path to the CSV")
+    args = ap.parse_args()
+
+    df = pd.read_csv(args.csv, dtype=str, keep_default_na=False)
+    try:
+        validate(df, args.kind, args.csv)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{args.csv}: {len(df)} rows OK")
+
+
+if __name__ == "__main__":
+    main()
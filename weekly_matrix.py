@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# weekly_matrix.py
+# Load the weekly county matrix (week_start x "STATE|County") and build the
+# binary series artifact the map reads instead of parsing the CSV in the browser.
+
+import argparse
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+# Same set the front end accepts as matrix column prefixes (app.js VALID_STATE_CODES).
+VALID_STATE_CODES = {
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS", "KY", "LA",
+    "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND", "OH", "OK",
+    "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY", "DC", "PR", "GU", "VI",
+}
+
+
+# ----------------------------- County name keys -----------------------------
+def norm_county(s: str) -> str:
+    """Python twin of normCounty() in app.js; keys must match the browser's exactly."""
+    s = unicodedata.normalize("NFD", str(s or ""))
+    s = re.sub("[\u0300-\u036f]", "", s).lower()
+    s = re.sub(r"[\W_]+", " ", s)
+    s = re.sub(r"\b(st|st\.)\b", "saint", s)
+    s = re.sub(r"\bcounty\s+of\s+", "", s)
+    s = re.sub(r"\bparish\s+of\s+", "", s)
+    s = re.sub(r"\bmunicipio\s+de\s+", "", s)
+    s = re.sub(r"\b(county|parish|borough|census area|city|municipality|municipio)\b", "", s)
+    return re.sub(r"\s+", "", s).strip()
+
+
+def county_keys(county: str) -> set:
+    """All normalized keys a matrix header's county part should answer to (buildStateAndCountyIndex)."""
+    base = county
+    no_suffix = re.sub(r"\b(County|Parish|Borough|Census Area|City|Municipality|Municipio)\b", "",
+                       base, flags=re.I).strip()
+    of_drop = re.sub(r"\b(County|Parish|Municipio)\s+of\s+", "", base, flags=re.I)
+    variants = {
+        base,
+        no_suffix,
+        of_drop,
+        re.sub(r"\bSt\.\b", "Saint", base, flags=re.I),
+        re.sub(r"\bSt\.\b", "Saint", no_suffix, flags=re.I),
+    }
+    return {k for k in map(norm_county, variants) if k}
+
+
+def split_header(header: str):
+    """'CA|Los Angeles' -> ('CA', 'Los Angeles'); None for week_start or unknown states."""
+    parts = header.split("|")
+    if len(parts) < 2:
+        return None
+    code = parts[0].strip()
+    if code not in VALID_STATE_CODES:
+        return None
+    return code, "|".join(parts[1:]).strip()
+
+
+# ----------------------------- Matrix loading -----------------------------
+def load_weekly_matrix(path: str):
+    """
+    Returns (weeks, headers, values): week_start labels, the "STATE|County" headers that
+    belong to a known state, and a weeks x headers float64 array (blanks -> 0).
+    `path` may also be a weekly_store.py directory; values are then its memory-mapped int32 rows.
+    """
+    if os.path.isdir(path):
+        from weekly_store import WeeklyStore  # imports this module
+
+        return WeeklyStore(path).matrix()
+    df = pd.read_csv(path, dtype={"week_start": str})
+    if "week_start" not in df.columns:
+        raise ValueError(f"{path}: weekly matrix missing required column: 'week_start'")
+    headers = [c for c in df.columns if c != "week_start" and split_header(c)]
+    values = df[headers].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+    return df["week_start"].astype(str).tolist(), headers, values
+
+
+def state_columns(headers: List[str]) -> Dict[str, List[int]]:
+    """{STATE: [column indexes]} for a list of matrix headers."""
+    out: Dict[str, List[int]] = {}
+    for i, h in enumerate(headers):
+        code, _ = split_header(h)
+        out.setdefault(code, []).append(i)
+    return out
+
+
+def state_sums(headers: List[str], values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Weekly state totals (sum of each state's county columns)."""
+    return {code: values[:, idx].sum(axis=1) for code, idx in state_columns(headers).items()}
+
+
+# ----------------------------- Binary artifact -----------------------------
+def build_artifacts(weeks: List[str], headers: List[str], values: np.ndarray, out_dir: str,
+                    name: str = "weekly") -> str:
+    """
+    Writes <name>.bin (one little-endian series per state, then per county, each
+    len(weeks) long) and <name>_index.json with labels, byte offsets and the
+    normalized county keys, so the browser can view or range-fetch any single series.
+    """
+    sums = state_sums(headers, values)
+    integral = bool(np.all(np.mod(values, 1) == 0))
+    dtype = np.dtype("<i4") if integral else np.dtype("<f4")
+    series_bytes = len(weeks) * dtype.itemsize
+
+    index = {
+        "data": f"{name}.bin",
+        "dtype": "int32" if integral else "float32",
+        "weeks": weeks,
+        "states": {},
+        "counties": {},
+        "county_keys": {},
+    }
+    blocks = []
+    for code in sorted(sums):
+        index["states"][code] = len(blocks) * series_bytes
+        blocks.append(sums[code])
+    for i, h in enumerate(headers):
+        code, county = split_header(h)
+        index["counties"].setdefault(code, {})[h] = len(blocks) * series_bytes
+        blocks.append(values[:, i])
+        keys = index["county_keys"].setdefault(code, {})
+        for k in county_keys(county):
+            keys[k] = h
+
+    os.makedirs(out_dir, exist_ok=True)
+    matrix = np.column_stack(blocks) if blocks else np.zeros((len(weeks), 0))
+    # column-major so each series is one contiguous run of bytes
+    with open(os.path.join(out_dir, index["data"]), "wb") as f:
+        f.write(matrix.astype(dtype).tobytes(order="F"))
+    index_path = os.path.join(out_dir, f"{name}_index.json")
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return index_path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the binary weekly series artifact for the map.")
+    ap.add_argument("--csv", default="assets/weekly_matrix_by_county.csv",
+                    help="Weekly matrix CSV (week_start + one 'STATE|County' column per county)")
+    ap.add_argument("--out-dir", default="assets/weekly",
+                    help="Where to write weekly.bin + weekly_index.json")
+    args = ap.parse_args()
+
+    weeks, headers, values = load_weekly_matrix(args.csv)
+    print(f"Loaded {len(weeks)} weeks x {len(headers)} counties from {args.csv}")
+    index_path = build_artifacts(weeks, headers, values, args.out_dir)
+    print(f"Wrote {index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# weekly_store.py
+# The weekly county matrix as an appendable on-disk store instead of one wide CSV:
+#   <root>/values.i4    little-endian int32, one row per week (row-major), memory-mapped on open
+#   <root>/index.json   {"dtype": "<i4", "data": "values.i4", "columns": ["CA|Los Angeles", ...],
+#                        "weeks": ["2025-10-06", ...]}
+#
+# A new week is one row appended to values.i4 (O(counties)); the index is replaced after the
+# data is on disk, so a crash mid-append leaves the previous state readable. Columns are
+# strided views into the map (no copy), and load_weekly_matrix() accepts the store directory
+# anywhere it accepts the CSV, so seeding and analytics read the history without loading it.
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from weekly_matrix import build_artifacts, load_weekly_matrix, split_header, state_columns
+
+
+DTYPE = np.dtype("<i4")
+DATA_FILE = "values.i4"
+INDEX_FILE = "index.json"
+
+
+class WeeklyStore:
+    """A weeks x columns int32 matrix on disk; read through a read-only memory map."""
+
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if np.dtype(index.get("dtype", "<i4")) != DTYPE:
+            raise ValueError(f"{root}: unsupported dtype {index.get('dtype')}")
+        self.data = index.get("data", DATA_FILE)
+        self.weeks: List[str] = index["weeks"]
+        self.columns: List[str] = index["columns"]
+        self.positions: Dict[str, int] = {c: i for i, c in enumerate(self.columns)}
+        self._map()
+
+    def _map(self):
+        shape = (len(self.weeks), len(self.columns))
+        if shape[0] * shape[1] == 0:
+            self.values = np.zeros(shape, dtype=DTYPE)  # mmap can't map zero bytes
+        else:
+            # the file may hold a torn row past the index; the shape keeps it out of view
+            self.values = np.memmap(os.path.join(self.root, self.data), dtype=DTYPE, mode="r", shape=shape)
+
+    # ----------------------------- Creating -----------------------------
+    @classmethod
+    def create(cls, root: str, columns: Sequence[str], weeks: Sequence[str] = (),
+               values: np.ndarray | None = None) -> "WeeklyStore":
+        columns = list(columns)
+        if len(set(columns)) != len(columns):
+            raise ValueError("duplicate column keys")
+        data = np.zeros((0, len(columns)), dtype=DTYPE) if values is None else _as_counts(values)
+        if data.shape != (len(weeks), len(columns)):
+            raise ValueError(f"values shape {data.shape} != {len(weeks)} weeks x {len(columns)} columns")
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, DATA_FILE), "wb") as f:
+            f.write(np.ascontiguousarray(data).tobytes())
+        _write_index(root, DATA_FILE, columns, list(weeks))
+        return cls(root)
+
+    @classmethod
+    def from_csv(cls, path: str, root: str) -> "WeeklyStore":
+        """Imports a weekly matrix CSV (the columns load_weekly_matrix keeps)."""
+        weeks, headers, values = load_weekly_matrix(path)
+        return cls.create(root, headers, weeks, values)
+
+    # ----------------------------- Reading -----------------------------
+    def column(self, key: str) -> np.ndarray:
+        """One series as a strided view into the map (no copy)."""
+        return self.values[:, self.positions[key]]
+
+    def state(self, code: str) -> np.ndarray:
+        """Weekly totals of one state's columns."""
+        cols = state_columns(self.columns).get(code, [])
+        return self.values[:, cols].sum(axis=1) if cols else np.zeros(len(self.weeks), dtype=np.int64)
+
+    def matrix(self):
+        """(weeks, headers, values) in the shape load_weekly_matrix() returns, values still mapped."""
+        headers = [c for c in self.columns if split_header(c)]
+        if len(headers) == len(self.columns):
+            return list(self.weeks), headers, self.values
+        return list(self.weeks), headers, self.values[:, [self.positions[h] for h in headers]]
+
+    # ----------------------------- Appending -----------------------------
+    def append_week(self, week_start: str, counts: Mapping[str, float] | Sequence[float]):
+        """
+        Appends one week: `counts` is {column: count} (missing columns are 0) or a full row
+        in column order. Weeks must be appended in order.
+        """
+        week = pd.Timestamp(week_start).strftime("%Y-%m-%d")
+        if self.weeks and week <= self.weeks[-1]:
+            raise ValueError(f"week {week} is not after the last stored week {self.weeks[-1]}")
+        if isinstance(counts, Mapping):
+            unknown = [k for k in counts if k not in self.positions]
+            if unknown:
+                raise KeyError(f"unknown columns (use add_columns first): {unknown[:5]}")
+            row = np.zeros(len(self.columns), dtype=np.float64)
+            row[[self.positions[k] for k in counts]] = list(counts.values())
+        else:
+            row = np.asarray(counts, dtype=np.float64)
+            if row.shape != (len(self.columns),):
+                raise ValueError(f"row has {row.size} values, store has {len(self.columns)} columns")
+        data_path = os.path.join(self.root, self.data)
+        with open(data_path, "r+b" if os.path.exists(data_path) else "wb") as f:
+            f.truncate(len(self.weeks) * len(self.columns) * DTYPE.itemsize)  # drop a torn row, if any
+            f.seek(0, os.SEEK_END)
+            f.write(_as_counts(row[None, :]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.weeks.append(week)
+        _write_index(self.root, self.data, self.columns, self.weeks)
+        self._map()
+
+    def append_frame(self, df: pd.DataFrame) -> int:
+        """Appends the rows of a matrix-shaped frame (week_start + column keys), oldest first."""
+        n = 0
+        for _, row in df.sort_values("week_start").iterrows():
+            counts = {c: v for c, v in row.items() if c != "week_start"}
+            self.append_week(row["week_start"], pd.to_numeric(pd.Series(counts), errors="coerce").fillna(0).to_dict())
+            n += 1
+        return n
+
+    def add_columns(self, keys: Sequence[str]):
+        """
+        New counties get zero history. This rewrites the data (O(weeks x columns)) into a new
+        file that the index switches to, so the old width stays readable until then.
+        """
+        new = [k for k in dict.fromkeys(keys) if k not in self.positions]
+        if not new:
+            return
+        data = np.hstack([np.asarray(self.values), np.zeros((len(self.weeks), len(new)), dtype=DTYPE)])
+        old, columns = self.data, self.columns + new
+        self.data = f"values-{len(columns)}.i4"
+        with open(os.path.join(self.root, self.data), "wb") as f:
+            f.write(np.ascontiguousarray(data).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        _write_index(self.root, self.data, columns, self.weeks)
+        self.values = None  # release the map before the old file goes
+        if old != self.data:
+            os.remove(os.path.join(self.root, old))
+        self.columns = columns
+        self.positions = {c: i for i, c in enumerate(self.columns)}
+        self._map()
+
+    # ----------------------------- Exporting -----------------------------
+    def to_csv(self, path: str):
+        """Writes the matrix back out in the weekly_matrix_by_county.csv layout."""
+        df = pd.DataFrame(np.asarray(self.values), columns=self.columns)
+        df.insert(0, "week_start", self.weeks)
+        df.to_csv(path, index=False)
+
+    def to_binary(self, out_dir: str, name: str = "weekly") -> str:
+        """The map's binary series artifact (see weekly_matrix.build_artifacts)."""
+        weeks, headers, values = self.matrix()
+        return build_artifacts(weeks, headers, values, out_dir, name)
+
+
+def _as_counts(values: np.ndarray) -> np.ndarray:
+    arr = np.asarray(values)
+    if arr.dtype.kind == "f":
+        if not np.all(np.mod(arr, 1) == 0):
+            raise ValueError("weekly counts must be whole numbers to store as int32")
+        if arr.size and (arr.max() > np.iinfo(DTYPE).max or arr.min() < np.iinfo(DTYPE).min):
+            raise ValueError("weekly counts out of int32 range")
+    return arr.astype(DTYPE)
+
+
+def _write_index(root: str, data: str, columns: List[str], weeks: List[str]):
+    path = os.path.join(root, INDEX_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"dtype": DTYPE.str, "data": data, "columns": columns, "weeks": weeks}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Manage the memory-mapped weekly matrix store.")
+    ap.add_argument("--store", default="data/weekly", help="Store directory")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("import", help="Create the store from a weekly matrix CSV")
+    p.add_argument("csv")
+    p = sub.add_parser("append", help="Append the week(s) in a matrix-shaped CSV (week_start + column keys)")
+    p.add_argument("csv")
+    p.add_argument("--add-columns", action="store_true", help="Add columns the store doesn't have yet")
+    p = sub.add_parser("export-csv", help="Write the matrix out as CSV")
+    p.add_argument("out")
+    p = sub.add_parser("export-bin", help="Write the map's weekly.bin + weekly_index.json")
+    p.add_argument("out_dir")
+    sub.add_parser("info", help="Print the store's size and week range")
+    args = ap.parse_args()
+
+    if args.cmd == "import":
+        store = WeeklyStore.from_csv(args.csv, args.store)
+        print(f"Imported {len(store.weeks)} weeks x {len(store.columns)} columns into {args.store}")
+        return
+    store = WeeklyStore(args.store)
+    if args.cmd == "append":
+        df = pd.read_csv(args.csv, dtype={"week_start": str})
+        if args.add_columns:
+            store.add_columns([c for c in df.columns if c != "week_start"])
+        try:
+            n = store.append_frame(df)
+        except KeyError as e:
+            sys.exit(f"{args.csv}: {e.args[0]} (or pass --add-columns)")
+        except ValueError as e:
+            sys.exit(f"{args.csv}: {e}")
+        print(f"Appended {n} week(s); {args.store} now ends at {store.weeks[-1]}")
+    elif args.cmd == "export-csv":
+        store.to_csv(args.out)
+        print(f"Wrote {args.out}")
+    elif args.cmd == "export-bin":
+        print(f"Wrote {store.to_binary(args.out_dir)}")
+    else:
+        span = f"{store.weeks[0]} .. {store.weeks[-1]}" if store.weeks else "empty"
+        print(f"{args.store}: {len(store.weeks)} weeks x {len(store.columns)} columns ({span}), "
+              f"{store.values.nbytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()